@@ -14,6 +14,8 @@ from scripts.email_analyzer import EmailAnalyzer516
 from scripts.domain_research import DomainResearch516
 from scripts.report_generator import ReportGenerator516
 from utils.logger import logger
+from utils.probe_engine import SharedProbeService516
+from utils.probe_cache import open_probe_cache
 
 class AdvancedScan516:
     def __init__(self, target, output_base="outputs"):
@@ -35,19 +37,25 @@ class AdvancedScan516:
         """Comprehensive username analysis"""
         logger.info("Starting username investigation...")
         
+        # Both tools go through one probe service, so a URL they have in
+        # common is fetched once and both report the same answer for it
+        probes = SharedProbeService516(cache=open_probe_cache(self.output_dir))
+        
         # Social media presence mapping
-        mapper = SocialMediaMapper516(self.output_dir)
+        mapper = SocialMediaMapper516(self.output_dir, engine=probes)
         social_results = mapper.map_presence(self.target)
         
         # Detailed username search
-        sherlock = Sherlock516(self.target, self.output_dir)
+        sherlock = Sherlock516(self.target, self.output_dir, engine=probes)
         sherlock.check_standard_sites()
         sherlock_results = sherlock.save_results()
+        probes.close()
         
         self.results['findings']['social_media'] = social_results
         self.results['findings']['username_search'] = sherlock_results
         self.results['tools_used'].extend(['SocialMediaMapper516', 'Sherlock516'])
         
+        logger.info(f"Probe service: {probes.stats['probes']} requests, {probes.stats['deduplicated']} deduplicated")
         logger.info(f"Username investigation completed - Found on {social_results['summary']['platforms_found']} platforms")
     
     def run_email_analysis(self, email=None):
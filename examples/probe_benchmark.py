@@ -0,0 +1,172 @@
+"""
+516 Hackers - Username Probe Benchmark
+Throughput, latency and transfer of the social probes against local stand-in platforms
+"""
+
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import utils
+from utils.config_loader import config
+from utils.export_utils import ExportUtils516
+from utils.platform_simulator import PlatformSimulator516
+from utils.probe_engine import ProbeEngine516
+from utils.scheduler import HostScheduler516
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+def peak_rss_kb():
+    """Peak resident set size of this process so far, in KB (ru_maxrss never goes down)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def run_size(rules, count, args):
+    """Probe `count` usernames across every rule and measure the sweep"""
+    engine = ProbeEngine516(max_workers=args.workers, timeout=args.timeout)
+    usernames = [f"bench_user_{i}" for i in range(count)]
+    latencies = []
+    totals = {'probes': 0, 'found': 0, 'errors': 0, 'throttled': 0, 'bytes': 0}
+
+    def record(username, platform, outcome):
+        totals['probes'] += 1
+        totals['bytes'] += outcome.get('bytes_transferred', 0)
+        if 'error' in outcome:
+            totals['errors'] += 1
+        elif outcome['exists']:
+            totals['found'] += 1
+        if outcome.get('attempts', 1) > 1 or outcome.get('throttled'):
+            totals['throttled'] += 1
+        latencies.append(outcome.get('response_time') or 0.0)
+
+    started = time.perf_counter()
+    if count == 1:
+        # Single username: the same path as map_presence/check_standard_sites
+        engine.probe_rules(rules, usernames[0], on_result=lambda platform, outcome: record(usernames[0], platform, outcome))
+    else:
+        scheduler = HostScheduler516(engine, rate=args.host_rate, burst=args.host_burst)
+        jobs = ((username, rule) for username in usernames for rule in rules.values())
+        scheduler.run(jobs, on_result=record, collect=False)
+    elapsed = time.perf_counter() - started
+    engine.close()
+
+    return {
+        'usernames': count,
+        'probes': totals['probes'],
+        'elapsed_seconds': round(elapsed, 3),
+        'probes_per_second': round(totals['probes'] / elapsed, 1) if elapsed else None,
+        'latency_p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        'latency_p99_ms': round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        'bytes_transferred': totals['bytes'],
+        'bytes_per_probe': round(totals['bytes'] / totals['probes'], 1) if totals['probes'] else None,
+        'found': totals['found'],
+        'errors': totals['errors'],
+        'retried_or_throttled': totals['throttled'],
+        'peak_rss_kb': peak_rss_kb()
+    }
+
+def run_size_isolated(rules, count, args):
+    """run_size in a freshly spawned process, so peak_rss_kb covers this size alone
+
+    The simulated platforms stay in the parent and are reached over localhost.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_size, rules, count, args).result()
+
+def compare(current, previous_path):
+    """Print probes/sec and bytes/probe relative to an earlier benchmark file"""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = {r['usernames']: r for r in json.load(f)['results']}
+
+    print(f"\n📊 Compared with {previous_path}:")
+    for result in current:
+        before = previous.get(result['usernames'])
+        if not before or not before.get('probes_per_second'):
+            continue
+        speedup = result['probes_per_second'] / before['probes_per_second']
+        print(f"   {result['usernames']:>6} usernames: {speedup:.2f}x probes/sec, "
+              f"{before['bytes_per_probe']} → {result['bytes_per_probe']} bytes/probe")
+
+def main():
+    parser = argparse.ArgumentParser(description='516 Hackers - Username Probe Benchmark')
+    parser.add_argument('--sizes', default='1,100,10000', help='Comma-separated username counts')
+    parser.add_argument('--latency', type=float, default=0.02, help='Simulated response latency (seconds)')
+    parser.add_argument('--status', type=int, default=200, help='Status code the platforms answer')
+    parser.add_argument('--body-size', type=int, default=50000, help='Profile page size in bytes')
+    parser.add_argument('--burst-every', type=int, default=0, help='Start a 429 burst every N requests per platform')
+    parser.add_argument('--burst-length', type=int, default=0, help='Requests per 429 burst')
+    parser.add_argument('--no-head', action='store_true', help='Simulated platforms refuse HEAD')
+    parser.add_argument('--workers', type=int, default=None, help='Global in-flight cap (default settings.max_workers)')
+    parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout')
+    parser.add_argument('--host-rate', type=float, default=1000.0, help='Per-host token bucket rate for bulk sizes')
+    parser.add_argument('--host-burst', type=int, default=100, help='Per-host token bucket burst for bulk sizes')
+    parser.add_argument('--label', default='', help='Free-form label stored with the results')
+    parser.add_argument('--compare', metavar='JSON', help='Earlier benchmark file to compare against')
+    parser.add_argument('-o', '--output', default='outputs', help='Output directory')
+
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    route = {
+        'latency': args.latency,
+        'status': args.status,
+        'body_size': args.body_size,
+        'supports_head': not args.no_head,
+        'burst_every': args.burst_every,
+        'burst_length': args.burst_length
+    }
+    platforms = config.get_platforms()
+
+    print("⏱️  516 Hackers - Username Probe Benchmark")
+    print("=" * 60)
+
+    results = []
+    with PlatformSimulator516({key: route for key in platforms}) as simulator:
+        rules = simulator.rules_for(platforms)
+        for size in sizes:
+            print(f"🔍 {size} usernames × {len(rules)} platforms...")
+            result = run_size_isolated(rules, size, args)
+            results.append(result)
+            print(f"   {result['probes_per_second']} probes/s, p50 {result['latency_p50_ms']} ms, "
+                  f"p99 {result['latency_p99_ms']} ms, {result['bytes_per_probe']} bytes/probe, "
+                  f"peak RSS {result['peak_rss_kb']} KB")
+        simulator_stats = simulator.stats()
+
+    report = {
+        'tool': '516 Hackers Probe Benchmark',
+        'version': utils.__version__,
+        'label': args.label,
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'scenario': dict(route, platforms=list(platforms), host_rate=args.host_rate,
+                         host_burst=args.host_burst, workers=args.workers),
+        'results': results,
+        'simulator': simulator_stats
+    }
+    filename = ExportUtils516(args.output).export_json(report, 'probe_benchmark')
+
+    if args.compare:
+        compare(results, args.compare)
+
+    print(f"📁 Benchmark saved to: {filename}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+516 Digital Investigation Tools - Domain Monitor
+Incremental re-checks of a domain watch list with per-facet freshness
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any
+from utils.config_loader import config
+from utils.helpers import read_targets
+from utils.logger import logger
+from utils.result_stream import NDJSONSink516
+from scripts.domain_research import DomainResearch516
+
+FACETS = ('whois_info', 'dns_info', 'http_headers', 'ip_info')
+
+# Seconds a facet stays fresh; dns_info is further bounded by its record TTLs
+DEFAULT_FRESHNESS = {
+    'whois_info': 604800,
+    'dns_info': 86400,
+    'http_headers': 86400,
+    'ip_info': 3600
+}
+
+# Values that change on every query without saying anything about the domain
+VOLATILE_KEYS = {
+    'ttl', 'cached', 'short_circuited', 'resolved_at', 'seconds', 'total_seconds',
+    'bytes_transferred', 'schemes_failed', 'reverse_status'
+}
+VOLATILE_HEADERS = {'date', 'age', 'expires', 'set-cookie', 'etag', 'last-modified', 'cf-ray', 'x-request-id'}
+
+# Top-level fields that just pick the first answer in DNS order; round-robin
+# rotates them on every query, and the full sets are compared elsewhere
+ORDER_DEPENDENT_KEYS = {'ip_info': {'ip_address', 'reverse_dns'}}
+
+# DNS statuses that say nothing about the domain, only about the lookup
+DNS_FAILURES = {'TIMEOUT', 'SERVFAIL', 'ERROR'}
+
+def _stable(value):
+    """Drop volatile fields and sort lists so equal answers in any order compare equal"""
+    if isinstance(value, dict):
+        return {
+            key: _stable(item) for key, item in value.items()
+            if key not in VOLATILE_KEYS and key.lower() not in VOLATILE_HEADERS
+        }
+    if isinstance(value, list):
+        items = [_stable(item) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True, default=str))
+    return value
+
+def comparable(facet, data):
+    """The part of a facet snapshot that is diffed between runs"""
+    skip = ORDER_DEPENDENT_KEYS.get(facet, set())
+    return _stable({key: value for key, value in data.items() if key not in skip})
+
+def facet_error(facet, data):
+    """Error message if a facet result must not replace the last snapshot, else None"""
+    if isinstance(data, dict) and 'error' in data:
+        return data['error']
+    if facet == 'dns_info':
+        statuses = {answer.get('status') for answer in data.values() if isinstance(answer, dict)}
+        if statuses and statuses <= DNS_FAILURES:
+            return f"Every DNS lookup failed ({', '.join(sorted(statuses))})"
+    return None
+
+def diff_facet(facet, old, new, path=None):
+    """List of {'facet', 'path', 'old', 'new'} changes between two facet snapshots"""
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in sorted(set(old) | set(new), key=str):
+            changes.extend(diff_facet(facet, old.get(key), new.get(key), path + [str(key)]))
+        return changes
+    if old == new:
+        return []
+    return [{'facet': facet, 'path': '.'.join(path), 'old': old, 'new': new}]
+
+class SnapshotStore516:
+    """Last known value of every facet per domain, with its expiry time"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS facet_snapshots (
+                domain TEXT NOT NULL,
+                facet TEXT NOT NULL,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (domain, facet)
+            )
+        """)
+        self._conn.commit()
+
+    def load(self, domain):
+        """{facet: {'data', 'fetched_at', 'expires_at'}} for a domain"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT facet, data, fetched_at, expires_at FROM facet_snapshots WHERE domain = ?", (domain,)
+            ).fetchall()
+        return {
+            facet: {'data': json.loads(data), 'fetched_at': fetched_at, 'expires_at': expires_at}
+            for facet, data, fetched_at, expires_at in rows
+        }
+
+    def save(self, domain, facet, data, expires_at):
+        """Replace a facet's snapshot"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO facet_snapshots (domain, facet, data, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (domain, facet, json.dumps(data, default=str), time.time(), expires_at)
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            self._conn.close()
+
+class DomainMonitor516:
+    """Refreshes only the stale facets of each watched domain and reports what changed"""
+
+    def __init__(self, store, researcher=None, freshness=None):
+        self.store = store
+        self.researcher = researcher or DomainResearch516()
+        settings = config.get('default', 'domain_monitor', {})
+        self.freshness = {**DEFAULT_FRESHNESS, **settings.get('freshness', {}), **(freshness or {})}
+        self.dns_min_seconds = settings.get('dns_min_seconds', 60)
+
+    def expiry_for(self, facet, data, now):
+        """When a freshly fetched facet goes stale"""
+        window = self.freshness[facet]
+        if facet == 'dns_info':
+            ttls = [answer['ttl'] for answer in data.values() if isinstance(answer, dict) and answer.get('ttl') is not None]
+            if ttls:
+                window = min(window, max(min(ttls), self.dns_min_seconds))
+        return now + window
+
+    def check(self, domain, force=False) -> Dict[str, Any]:
+        """Re-query the stale facets of a domain and return its change record"""
+        now = time.time()
+        snapshot = self.store.load(domain)
+        stale = [facet for facet in FACETS if force or facet not in snapshot or snapshot[facet]['expires_at'] <= now]
+
+        record = {
+            'type': 'change',
+            'domain': domain,
+            'checked_at': datetime.now().isoformat(),
+            'refreshed': stale,
+            'fresh': [facet for facet in FACETS if facet not in stale],
+            'new': not snapshot,
+            'changes': [],
+            'errors': {}
+        }
+        if not stale:
+            return record
+
+        results = self.researcher.comprehensive_analysis(domain, facets=stale)
+        for facet in stale:
+            data = results[facet]
+            error = facet_error(facet, data)
+            if error is not None:
+                # Keep the old snapshot; it is retried on the next run
+                record['errors'][facet] = error
+                continue
+            if facet in snapshot:
+                record['changes'].extend(
+                    diff_facet(facet, comparable(facet, snapshot[facet]['data']), comparable(facet, data))
+                )
+            self.store.save(domain, facet, data, self.expiry_for(facet, data, now))
+
+        return record
+
+    def check_bulk(self, domains, sink, workers=None, force=False) -> Dict[str, Any]:
+        """Check a watch list on a bounded pool, streaming one change record per domain"""
+        workers = workers or config.get('default', 'domain_research.bulk_workers', 8)
+        summary = {'domains': len(domains), 'new': 0, 'changed': 0, 'unchanged': 0, 'errors': 0, 'facets_refreshed': 0}
+        started = time.monotonic()
+
+        for domain, record, error in self.researcher.map_domains(lambda d: self.check(d, force), domains, workers):
+            if error is not None:
+                logger.error(f"Monitoring failed for {domain}: {error}")
+                record = {'type': 'change', 'domain': domain, 'error': str(error)}
+                summary['errors'] += 1
+            elif record['new']:
+                summary['new'] += 1
+            elif record['changes']:
+                summary['changed'] += 1
+            else:
+                summary['unchanged'] += 1
+            if error is None:
+                summary['facets_refreshed'] += len(record['refreshed'])
+                summary['errors'] += int(bool(record['errors']))
+            sink.write(record)
+
+        summary['elapsed_seconds'] = round(time.monotonic() - started, 3)
+        sink.close(summary)
+        return summary
+
+def open_snapshot_store(output_dir):
+    """Open the snapshot store under output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+    filename = config.get('default', 'domain_monitor.filename', 'domain_snapshots.sqlite')
+    return SnapshotStore516(os.path.join(output_dir, filename))
+
+def main():
+    parser = argparse.ArgumentParser(description='516 Digital Investigation Tools - Domain Monitor')
+    parser.add_argument('watch_list', help='File with one domain per line (- for stdin)')
+    parser.add_argument('--workers', type=int, default=None, help='Domains checked in parallel')
+    parser.add_argument('--force', action='store_true', help='Refresh every facet regardless of freshness')
+    parser.add_argument('-o', '--output', default='outputs', help='Output directory')
+
+    args = parser.parse_args()
+
+    try:
+        domains = [domain.lower().rstrip('.') for domain in read_targets(args.watch_list)]
+    except FileNotFoundError:
+        print(f"❌ File not found: {args.watch_list}")
+        return
+
+    print(f"👁️  516 Digital Investigation Tools - Monitoring {len(domains)} domains")
+    print("=" * 60)
+
+    store = open_snapshot_store(args.output)
+    monitor = DomainMonitor516(store)
+    sink = NDJSONSink516.create(args.output, "domain_changes", '516 Digital Investigation Tools - Domain Monitor')
+    summary = monitor.check_bulk(domains, sink, workers=args.workers, force=args.force)
+    store.close()
+
+    print(f"✅ {summary['changed']} changed, {summary['unchanged']} unchanged, {summary['new']} new, "
+          f"{summary['errors']} with errors")
+    print(f"🔄 Facets refreshed: {summary['facets_refreshed']} of {len(domains) * len(FACETS)}")
+    print(f"📁 Change records streamed to: {sink.path}")
+
+if __name__ == "__main__":
+    main()
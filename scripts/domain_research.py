@@ -4,23 +4,54 @@
 Domain information and reputation analysis
 """
 
-import whois
-import requests
-import socket
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
 from datetime import datetime
+from functools import partial
 from typing import Dict, Any
+from utils.config_loader import config
 from utils.logger import logger
 from utils.export_utils import ExportUtils516
+from utils.dns_client import get_dns_client, DEFAULT_RECORD_TYPES
+from utils.whois_client import get_whois_client
+from utils.http_inspector import get_header_inspector
+from utils.helpers import read_targets
+from utils.result_stream import NDJSONSink516, read_stream
+
+# Seconds each comprehensive_analysis stage may take before it is abandoned
+DEFAULT_STAGE_TIMEOUTS = {
+    'whois_info': 20,
+    'dns_info': 15,
+    'http_headers': 15,
+    'ip_info': 10
+}
 
 class DomainResearch516:
-    def __init__(self):
+    def __init__(self, extra_record_types=None):
         self.export_utils = ExportUtils516()
+        self.dns_client = get_dns_client()
+        self._whois_client = None
+        self.header_inspector = get_header_inspector()
+        if extra_record_types is None:
+            extra_record_types = config.get('default', 'domain_research.extra_record_types', [])
+        self.extra_record_types = [record_type.upper() for record_type in extra_record_types]
+    
+    @property
+    def whois_client(self):
+        """Shared WHOIS client, opened on first use"""
+        if self._whois_client is None:
+            self._whois_client = get_whois_client()
+        return self._whois_client
     
-    def get_whois_info(self, domain: str) -> Dict[str, Any]:
-        """Get WHOIS information for domain"""
+    def get_whois_info(self, domain: str, deadline: float = None) -> Dict[str, Any]:
+        """Get WHOIS information for domain (raw responses are cached, parsed on demand)
+        
+        `deadline` (time.monotonic()) bounds the wait for the registry's rate limit.
+        """
         try:
-            whois_data = whois.whois(domain)
+            record = self.whois_client.lookup(domain, deadline=deadline)
+            whois_data = record.parsed
             
             # Convert to serializable format
             result = {}
@@ -36,107 +67,255 @@ class DomainResearch516:
                 else:
                     result[key] = value
             
+            result['whois_server'] = record.server
+            result['cached'] = record.cached
             return result
         except Exception as e:
             logger.error(f"WHOIS lookup failed for {domain}: {e}")
             return {'error': str(e)}
     
     def get_dns_info(self, domain: str) -> Dict[str, Any]:
-        """Get DNS information"""
-        import dns.resolver
-        
-        record_types = ['A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME']
-        dns_results = {}
-        
-        for record_type in record_types:
-            try:
-                answers = dns.resolver.resolve(domain, record_type)
-                dns_results[record_type] = [str(rdata) for rdata in answers]
-            except Exception as e:
-                dns_results[record_type] = f"Error: {e}"
+        """Get DNS information
         
-        return dns_results
+        All record types are queried at once from the shared resolver. Each
+        type maps to {'status', 'ttl', 'records'}; an NXDOMAIN on any answer
+        cancels the queries still in flight.
+        """
+        record_types = list(DEFAULT_RECORD_TYPES) + list(self.extra_record_types)
+        return self.dns_client.query(domain, record_types)
     
     def check_http_headers(self, domain: str) -> Dict[str, Any]:
-        """Analyze HTTP headers"""
+        """Analyze HTTP headers
+        
+        Reads headers only (HEAD, or a GET closed after the headers) over the
+        shared keep-alive pool, trying HTTPS before HTTP and timing every
+        redirect hop.
+        """
         try:
-            response = requests.get(f"http://{domain}", timeout=10, allow_redirects=True)
-            headers_analysis = {
-                'status_code': response.status_code,
-                'final_url': response.url,
-                'headers': dict(response.headers),
-                'server': response.headers.get('Server', 'Unknown'),
-                'content_type': response.headers.get('Content-Type', 'Unknown'),
-                'security_headers': {}
-            }
-            
-            # Check security headers
-            security_headers = [
-                'Strict-Transport-Security',
-                'Content-Security-Policy', 
-                'X-Frame-Options',
-                'X-Content-Type-Options',
-                'X-XSS-Protection'
-            ]
-            
-            for header in security_headers:
-                headers_analysis['security_headers'][header] = response.headers.get(header, 'Not Present')
-            
-            return headers_analysis
+            return self.header_inspector.inspect(domain)
         except Exception as e:
             return {'error': str(e)}
     
     def get_ip_info(self, domain: str) -> Dict[str, Any]:
-        """Get IP address information"""
+        """Get IP address information
+        
+        Every A and AAAA address is reverse-resolved concurrently; lookups
+        still running at domain_research.reverse_deadline are reported as
+        timed out. Forward and PTR answers both come from the shared DNS cache.
+        """
         try:
-            ip_address = socket.gethostbyname(domain)
+            answers = self.dns_client.query(domain, ['A', 'AAAA'])
+            addresses = answers['A']['records'] + answers['AAAA']['records']
+            if not addresses:
+                statuses = ', '.join(f"{t} {answer['status']}" for t, answer in answers.items())
+                return {'error': f'No addresses for {domain} ({statuses})'}
+            
+            deadline = config.get('default', 'domain_research.reverse_deadline', 3)
+            reverse = self.dns_client.reverse(addresses, deadline=deadline)
             
-            # Basic IP information
             ip_info = {
-                'ip_address': ip_address,
+                'ip_address': addresses[0],
                 'hostname': domain,
-                'resolved_at': datetime.now().isoformat()
+                'resolved_at': datetime.now().isoformat(),
+                'addresses': [
+                    {
+                        'ip_address': address,
+                        'version': 4 if address in answers['A']['records'] else 6,
+                        'reverse_dns': [name.rstrip('.') for name in reverse[address]['records']],
+                        'reverse_status': reverse[address]['status']
+                    }
+                    for address in addresses
+                ]
             }
             
-            # Optional: Reverse DNS lookup
-            try:
-                hostname, aliaslist, ipaddrlist = socket.gethostbyaddr(ip_address)
+            primary = ip_info['addresses'][0]
+            if primary['reverse_dns']:
                 ip_info['reverse_dns'] = {
-                    'hostname': hostname,
-                    'aliases': aliaslist,
-                    'ip_addresses': ipaddrlist
+                    'hostname': primary['reverse_dns'][0],
+                    'aliases': primary['reverse_dns'][1:],
+                    'ip_addresses': [primary['ip_address']]
                 }
-            except socket.herror:
+            else:
                 ip_info['reverse_dns'] = 'Not available'
             
             return ip_info
         except Exception as e:
             return {'error': str(e)}
     
-    def comprehensive_analysis(self, domain: str) -> Dict[str, Any]:
-        """Perform comprehensive domain analysis"""
+    def comprehensive_analysis(self, domain: str, stage_timeouts: Dict[str, float] = None,
+                               deadline: float = None, facets=None) -> Dict[str, Any]:
+        """Perform comprehensive domain analysis
+        
+        The four stages run concurrently. A stage that misses its own timeout,
+        or the overall deadline, is reported as timed out while the others
+        still return their results. `facets` restricts the run to some stages.
+        """
         print(f"🔍 516 Digital Investigation Tools - Analyzing domain: {domain}")
         
+        stage_timeouts = {
+            **DEFAULT_STAGE_TIMEOUTS,
+            **config.get('default', 'domain_research.stage_timeouts', {}),
+            **(stage_timeouts or {})
+        }
+        deadline = deadline or config.get('default', 'domain_research.deadline', 30)
+        
+        started = time.monotonic()
+        stages = {
+            # WHOIS waits on a per-registry rate limit; it must give up with the stage
+            'whois_info': partial(self.get_whois_info, deadline=started + min(stage_timeouts['whois_info'], deadline)),
+            'dns_info': self.get_dns_info,
+            'http_headers': self.check_http_headers,
+            'ip_info': self.get_ip_info
+        }
+        if facets is not None:
+            stages = {key: stage for key, stage in stages.items() if key in facets}
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, len(stages)))
+        futures = {key: executor.submit(self._run_stage, stage, domain) for key, stage in stages.items()}
+        
         results = {
             'domain': domain,
-            'analysis_date': datetime.now().isoformat(),
-            'whois_info': self.get_whois_info(domain),
-            'dns_info': self.get_dns_info(domain),
-            'http_headers': self.check_http_headers(domain),
-            'ip_info': self.get_ip_info(domain),
-            'tool': '516 Digital Investigation Tools - Domain Research'
+            'analysis_date': datetime.now().isoformat()
         }
+        stage_timings = {}
+        
+        for key, future in futures.items():
+            limit = min(stage_timeouts[key], deadline)
+            remaining = max(0.0, started + limit - time.monotonic())
+            try:
+                results[key], elapsed = future.result(timeout=remaining)
+                status = 'error' if isinstance(results[key], dict) and 'error' in results[key] else 'ok'
+            except FutureTimeout:
+                future.cancel()
+                elapsed = time.monotonic() - started
+                results[key] = {'error': f'Timed out after {limit:g}s'}
+                status = 'timeout'
+            stage_timings[key] = {'seconds': round(elapsed, 3), 'status': status}
+        
+        # Stragglers keep running in the background; their own network
+        # timeouts bound how long they can linger
+        executor.shutdown(wait=False)
+        
+        results['stage_timings'] = stage_timings
+        results['total_seconds'] = round(time.monotonic() - started, 3)
+        results['partial'] = any(timing['status'] == 'timeout' for timing in stage_timings.values())
+        results['tool'] = '516 Digital Investigation Tools - Domain Research'
         
         return results
+    
+    def research_bulk(self, domains, sink, workers=None, completed=None) -> Dict[str, Any]:
+        """Analyze many domains on a bounded worker pool, streaming one record per domain
+        
+        Domains in `completed` (e.g. from completed_domains on an earlier
+        stream) are skipped, so an interrupted run can resume.
+        """
+        workers = workers or config.get('default', 'domain_research.bulk_workers', 8)
+        completed = completed or set()
+        pending_domains = [d for d in domains if d.lower() not in completed]
+        summary = {
+            'domains': len(domains),
+            'skipped': len(domains) - len(pending_domains),
+            'analyzed': 0,
+            'partial': 0,
+            'failed': 0
+        }
+        started = time.monotonic()
+        
+        for domain, results, error in self.map_domains(self.comprehensive_analysis, pending_domains, workers):
+            if error is not None:
+                logger.error(f"Domain research failed for {domain}: {error}")
+                sink.write({'type': 'domain', 'domain': domain, 'error': str(error)})
+                summary['failed'] += 1
+            else:
+                sink.write(dict({'type': 'domain'}, **results))
+                summary['analyzed'] += 1
+                summary['partial'] += int(results['partial'])
+        
+        summary['elapsed_seconds'] = round(time.monotonic() - started, 3)
+        sink.close(summary)
+        return summary
+    
+    def map_domains(self, func, domains, workers):
+        """Yield (domain, result, error) as func finishes for each domain on a bounded pool"""
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            queue = iter(domains)
+            in_flight = {}
+            
+            def submit_next():
+                domain = next(queue, None)
+                if domain is not None:
+                    in_flight[executor.submit(func, domain)] = domain
+            
+            # Keep the pool fed without queueing every domain up front
+            for _ in range(workers * 2):
+                submit_next()
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    domain = in_flight.pop(future)
+                    try:
+                        yield domain, future.result(), None
+                    except Exception as e:
+                        yield domain, None, e
+                    submit_next()
+    
+    def _run_stage(self, stage, domain):
+        """Run one analysis stage and time it"""
+        started = time.monotonic()
+        result = stage(domain)
+        return result, time.monotonic() - started
+
+def completed_domains(stream_path):
+    """Domains that already have a finished record in an earlier bulk stream; failures are retried"""
+    return {record['domain'].lower() for record in read_stream(stream_path, 'domain') if 'error' not in record}
 
 def main():
     parser = argparse.ArgumentParser(description='516 Digital Investigation Tools - Domain Research')
-    parser.add_argument('domain', help='Domain to research')
+    parser.add_argument('domain', nargs='?', help='Domain to research')
+    parser.add_argument('-f', '--file', help='File with one domain per line (- for stdin)')
+    parser.add_argument('--workers', type=int, default=None, help='Domains analyzed in parallel in bulk mode')
+    parser.add_argument('--resume', metavar='NDJSON', help='Continue an interrupted bulk run, appending to its stream')
+    parser.add_argument('--extra-records', metavar='TYPES',
+                        help='Comma-separated extra record types to query, e.g. SOA,CAA,SRV')
     parser.add_argument('-o', '--output', default='outputs', help='Output directory')
     
     args = parser.parse_args()
     
-    researcher = DomainResearch516()
+    extra_record_types = args.extra_records.split(',') if args.extra_records else None
+    researcher = DomainResearch516(extra_record_types=extra_record_types)
+    
+    if args.file or args.resume:
+        if not args.file:
+            print("❌ --resume needs the original domain list via -f")
+            return
+        try:
+            domains = [domain.lower().rstrip('.') for domain in read_targets(args.file)]
+        except FileNotFoundError:
+            print(f"❌ File not found: {args.file}")
+            return
+        
+        if args.resume:
+            completed = completed_domains(args.resume)
+            sink = NDJSONSink516(args.resume, '516 Digital Investigation Tools - Domain Research')
+        else:
+            completed = set()
+            sink = NDJSONSink516.create(args.output, "domain_research_bulk", '516 Digital Investigation Tools - Domain Research')
+        
+        print(f"🌐 516 Digital Investigation Tools - Domain Research: {len(domains)} domains")
+        print("=" * 60)
+        
+        summary = researcher.research_bulk(domains, sink, workers=args.workers, completed=completed)
+        
+        print(f"✅ Analyzed {summary['analyzed']} domains ({summary['skipped']} already done, "
+              f"{summary['partial']} partial, {summary['failed']} failed)")
+        print(f"⏱️  Completed in {summary['elapsed_seconds']}s")
+        print(f"📁 Results streamed to: {sink.path}")
+        return
+    
+    if not args.domain:
+        print("❌ Please provide a domain or file with -f option")
+        return
     
     print(f"🌐 516 Digital Investigation Tools - Domain Research: {args.domain}")
     print("=" * 60)
@@ -148,9 +327,15 @@ def main():
     
     # Print summary
     print(f"✅ WHOIS Info: {'Available' if 'error' not in results['whois_info'] else 'Error'}")
-    print(f"✅ DNS Records: {len(results['dns_info'])} types found")
+    dns_info = results['dns_info']
+    found_types = [t for t, answer in dns_info.items() if isinstance(answer, dict) and answer.get('status') == 'NOERROR']
+    print(f"✅ DNS Records: {len(found_types)} types found")
+    cache_stats = researcher.dns_client.cache_stats()
+    if cache_stats:
+        print(f"🗄️  DNS cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
     print(f"✅ HTTP Headers: {'Available' if 'error' not in results['http_headers'] else 'Error'}")
     print(f"✅ IP Information: {'Available' if 'error' not in results['ip_info'] else 'Error'}")
+    print(f"⏱️  Completed in {results['total_seconds']}s{' (partial results)' if results['partial'] else ''}")
     print(f"📁 Full report saved to: {filename}")
 
 if __name__ == "__main__":
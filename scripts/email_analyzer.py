@@ -5,18 +5,57 @@ Email validation and OSINT gathering
 """
 
 import re
-import dns.resolver
+import os
+import math
+import csv
+import sys
+import json
+import time
+import asyncio
 import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
 from typing import Dict, Any
+from utils.config_loader import config
 from utils.logger import logger
 from utils.export_utils import ExportUtils516
+from utils.dns_client import get_dns_client
+from utils.result_stream import NDJSONSink516
+
+# Basic email validation regex
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+SPECIAL_CHARS = re.compile(r'[._%+-]')
+
+# (format, local-part regex, role of each capture group) in match priority order
+FORMAT_TEMPLATES = [
+    ('role', r'(?:info|admin|sales|support|contact|hello|office|hr|jobs|careers|billing|help|marketing|press|'
+             r'noreply|no-reply|webmaster|postmaster|team|enquiries|accounts|security|abuse)', ()),
+    ('{first}.{last}', r'([a-z]{2,})\.([a-z]{2,})', ('first', 'last')),
+    ('{first}_{last}', r'([a-z]{2,})_([a-z]{2,})', ('first', 'last')),
+    ('{first}-{last}', r'([a-z]{2,})-([a-z]{2,})', ('first', 'last')),
+    ('{first}.{m}.{last}', r'([a-z]{2,})\.[a-z]\.([a-z]{2,})', ('first', 'last')),
+    ('{f}.{last}', r'[a-z]\.([a-z]{2,})', ('last',)),
+    ('{first}.{l}', r'([a-z]{2,})\.[a-z]', ('first',)),
+    ('{token}{digits}', r'[a-z]+[._-]?\d+', ()),
+    ('{token}', r'[a-z]{2,}', ())
+]
+NON_PERSONAL_FORMATS = ('role', 'other')
 
 class EmailAnalyzer516:
     def __init__(self):
         self.export_utils = ExportUtils516()
+        self.dns_client = get_dns_client()
     
     def validate_email(self, email: str) -> Dict[str, Any]:
         """Validate email format and domain"""
+        result = self._check_syntax(email)
+        if result['is_valid_format']:
+            result['mx_records'] = self._check_mx_records(result['domain'])
+        return result
+    
+    def _check_syntax(self, email: str) -> Dict[str, Any]:
+        """Format validation and syntax analysis, without touching the network"""
         result = {
             'email': email,
             'is_valid_format': False,
@@ -25,38 +64,41 @@ class EmailAnalyzer516:
             'syntax_analysis': {}
         }
         
-        # Basic email validation regex
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        result['is_valid_format'] = bool(re.match(pattern, email))
+        result['is_valid_format'] = bool(EMAIL_PATTERN.match(email))
         
         if result['is_valid_format']:
-            result['domain'] = email.split('@')[1]
-            result['mx_records'] = self._check_mx_records(result['domain'])
+            local_part, _, result['domain'] = email.partition('@')
             
             # Syntax analysis
             result['syntax_analysis'] = {
-                'local_part': email.split('@')[0],
+                'local_part': local_part,
                 'domain_part': result['domain'],
                 'length': len(email),
-                'has_special_chars': bool(re.search(r'[._%+-]', email.split('@')[0]))
+                'has_special_chars': bool(SPECIAL_CHARS.search(local_part))
             }
         
         return result
     
     def _check_mx_records(self, domain: str) -> list:
-        """Check MX records for domain"""
-        try:
-            answers = dns.resolver.resolve(domain, 'MX')
-            mx_records = []
-            for rdata in answers:
-                mx_records.append({
-                    'preference': rdata.preference,
-                    'exchange': str(rdata.exchange)
-                })
-            return mx_records
-        except Exception as e:
-            logger.warning(f"Could not resolve MX records for {domain}: {e}")
-            return []
+        """Check MX records for domain (served from the shared DNS cache when fresh)"""
+        answer = self.dns_client.resolve(domain, 'MX')
+        if answer['status'] != 'NOERROR':
+            logger.warning(f"Could not resolve MX records for {domain}: {answer.get('error', answer['status'])}")
+        return answer['records']
+    
+    async def _resolve_mx_async(self, domains) -> Dict[str, list]:
+        """MX records for many domains at once, bounded by email.mx_concurrency"""
+        semaphore = asyncio.Semaphore(config.get('default', 'email.mx_concurrency', 50))
+        
+        async def resolve(domain):
+            async with semaphore:
+                answer = await self.dns_client.query_one_async(domain, 'MX')
+            if answer['status'] != 'NOERROR':
+                logger.warning(f"Could not resolve MX records for {domain}: {answer.get('error', answer['status'])}")
+            return answer['records']
+        
+        records = await asyncio.gather(*(resolve(domain) for domain in domains))
+        return dict(zip(domains, records))
     
     def analyze_email_pattern(self, email: str) -> Dict[str, Any]:
         """Analyze email pattern for OSINT"""
@@ -92,33 +134,288 @@ class EmailAnalyzer516:
         return analysis
     
     def bulk_analyze(self, emails: list) -> Dict[str, Any]:
-        """Analyze multiple emails"""
+        """Analyze multiple emails
+        
+        Syntax is checked first, then MX records are resolved once per
+        distinct domain, concurrently, and shared by every address on it.
+        """
         results = {
             'total_emails': len(emails),
             'valid_emails': 0,
             'invalid_emails': 0,
-            'domains_found': set(),
+            'domains_found': [],
             'analysis_results': []
         }
         
         for email in emails:
-            analysis = self.validate_email(email.strip())
+            analysis = self._check_syntax(email.strip())
             results['analysis_results'].append(analysis)
             
             if analysis['is_valid_format']:
                 results['valid_emails'] += 1
-                results['domains_found'].add(analysis['domain'])
             else:
                 results['invalid_emails'] += 1
         
-        results['domains_found'] = list(results['domains_found'])
+        # DNS names are case-insensitive, so User@Gmail.com and user@gmail.com share a lookup
+        domains = list(dict.fromkeys(
+            analysis['domain'].lower() for analysis in results['analysis_results'] if analysis['is_valid_format']
+        ))
+        mx_by_domain = asyncio.run(self._resolve_mx_async(domains)) if domains else {}
+        
+        for analysis in results['analysis_results']:
+            if analysis['is_valid_format']:
+                analysis['mx_records'] = list(mx_by_domain[analysis['domain'].lower()])
+        
+        results['domains_found'] = domains
+        results['mx_lookups'] = len(domains)
+        results['dns_cache'] = self.dns_client.cache_stats()
         
         return results
 
+    def stream_analyze(self, source, writer, chunksize=None, resolve_mx=True) -> Dict[str, Any]:
+        """Validate a very large email list chunk by chunk with vectorized string ops
+        
+        Only one chunk is in memory at a time. Each chunk is validated and
+        split as a batch, its distinct domains get MX lookups, and the rows
+        go straight to `writer` (an EmailStreamWriter516).
+        """
+        chunksize = chunksize or config.get('default', 'email.stream_chunksize', 100000)
+        summary = {'total_emails': 0, 'valid_emails': 0, 'invalid_emails': 0, 'mx_lookups': 0}
+        domains_seen = set()
+        started = time.monotonic()
+        
+        for emails in self._read_chunks(source, chunksize):
+            emails = emails[emails != '']
+            if emails.empty:
+                continue
+            frame = self._analyze_chunk(emails)
+            
+            valid = frame['is_valid_format']
+            if resolve_mx:
+                domains = frame.loc[valid, 'domain'].str.lower().unique().tolist()
+                mx_by_domain = asyncio.run(self._resolve_mx_async(domains)) if domains else {}
+                # object dtype, so a chunk with no valid address stays None rather than float NaN
+                frame['mx_records'] = frame['domain'].str.lower().map(mx_by_domain).astype(object).where(valid, None)
+                frame['mx_count'] = frame['mx_records'].map(lambda records: len(records) if isinstance(records, list) else 0)
+                summary['mx_lookups'] += len(domains)
+                domains_seen.update(domains)
+            
+            writer.write_frame(frame)
+            summary['total_emails'] += len(frame)
+            summary['valid_emails'] += int(valid.sum())
+        
+        summary['invalid_emails'] = summary['total_emails'] - summary['valid_emails']
+        summary['unique_domains'] = len(domains_seen)
+        summary['elapsed_seconds'] = round(time.monotonic() - started, 3)
+        summary['dns_cache'] = self.dns_client.cache_stats()
+        writer.close(summary)
+        return summary
+    
+    def _read_chunks(self, source, chunksize):
+        """Yield stripped Series of addresses, chunksize lines at a time (- reads stdin)"""
+        reader = pd.read_csv(
+            sys.stdin if source == '-' else source,
+            header=None, names=['email'], dtype=str, sep='\x1f', quoting=csv.QUOTE_NONE,
+            na_filter=False, skip_blank_lines=True, chunksize=chunksize
+        )
+        for chunk in reader:
+            yield chunk['email'].str.strip()
+    
+    def analyze_corpus(self, source, chunksize=None) -> pd.DataFrame:
+        """Per-domain address format table for a whole list, in one bounded-memory pass"""
+        chunksize = chunksize or config.get('default', 'email.stream_chunksize', 100000)
+        stats = EmailPatternStats516()
+        for emails in self._read_chunks(source, chunksize):
+            stats.add(emails)
+        return stats.summary()
+    
+    def _analyze_chunk(self, emails) -> pd.DataFrame:
+        """Vectorized _check_syntax over a Series of addresses"""
+        valid = emails.str.match(EMAIL_PATTERN.pattern)
+        parts = emails.str.partition('@')
+        local_part = parts[0].where(valid, None)
+        return pd.DataFrame({
+            'email': emails,
+            'is_valid_format': valid,
+            'domain': parts[2].where(valid, None),
+            'local_part': local_part,
+            'length': emails.str.len().where(valid).astype('Int64'),
+            'has_special_chars': local_part.str.contains(SPECIAL_CHARS.pattern).where(valid, None)
+        })
+
+class EmailPatternStats516:
+    """Aggregates local-part formats per domain and infers each domain's house format
+
+    Local parts are classified in vectorized batches against FORMAT_TEMPLATES.
+    Bare single-word local parts ("jsmith", "john") are ambiguous on their
+    own. They are resolved at the end against the first and last names
+    revealed by separated forms like first.last, in the same domain or
+    anywhere in the corpus, using a bounded sample per domain. Memory is
+    therefore proportional to the number of domains, not addresses.
+    """
+
+    def __init__(self, name_cap=2000, token_sample=500):
+        self.name_cap = name_cap
+        self.token_sample = token_sample
+        self.counts = {}
+        self.firsts = {}
+        self.lasts = {}
+        self.tokens = {}
+
+    def add(self, emails):
+        """Classify a Series of addresses and fold them into the per-domain counts"""
+        emails = emails[emails.str.match(EMAIL_PATTERN.pattern)]
+        if emails.empty:
+            return
+        parts = emails.str.lower().str.partition('@').reset_index(drop=True)
+        # Sub-addressing tags (user+tag@) say nothing about the house format
+        local = parts[0].str.split('+', n=1).str[0]
+        domain = parts[2]
+
+        # Each template only sees the rows no earlier template claimed
+        labels = np.full(len(local), 'other', dtype=object)
+        remaining = local
+        for name, regex, _ in FORMAT_TEMPLATES:
+            hit = remaining.str.fullmatch(regex).to_numpy(dtype=bool)
+            labels[remaining.index[hit]] = name
+            remaining = remaining[~hit]
+        frame = pd.DataFrame({'domain': domain, 'local': local, 'format': labels})
+
+        for (dom, fmt), count in frame.groupby(['domain', 'format']).size().items():
+            domain_counts = self.counts.setdefault(dom, {})
+            domain_counts[fmt] = domain_counts.get(fmt, 0) + int(count)
+
+        for fmt, regex, roles in FORMAT_TEMPLATES:
+            rows = frame[frame['format'] == fmt]
+            if not roles or rows.empty:
+                continue
+            names = rows['local'].str.extract(regex)
+            for group, role in enumerate(roles):
+                target = self.firsts if role == 'first' else self.lasts
+                pairs = pd.DataFrame({'domain': rows['domain'], 'name': names[group]}).drop_duplicates()
+                # Names seen anywhere are kept too (under None), for domains with few separated addresses
+                for dom, name in zip(pairs['domain'], pairs['name']):
+                    for key, cap in ((dom, self.name_cap), (None, self.name_cap * 10)):
+                        known = target.setdefault(key, set())
+                        if len(known) < cap:
+                            known.add(name)
+
+        single = frame[frame['format'] == '{token}'].groupby('domain').head(self.token_sample)
+        for dom, token in zip(single['domain'], single['local']):
+            sample = self.tokens.setdefault(dom, [])
+            if len(sample) < self.token_sample:
+                sample.append(token)
+
+    def _resolve_tokens(self, domain):
+        """Split a domain's single-word count across {f}{last}, {first}{last} and {first}"""
+        total = self.counts[domain].get('{token}', 0)
+        sample = self.tokens.get(domain, [])
+        if not total or not sample:
+            return {}
+        # Names from this domain or from anywhere in the corpus
+        name_sets = {
+            role: (names.get(domain, set()), names.get(None, set()))
+            for role, names in (('first', self.firsts), ('last', self.lasts))
+        }
+
+        def known(role, name):
+            return any(name in names for names in name_sets[role])
+
+        resolved = {}
+        for token in sample:
+            if known('last', token[1:]):
+                fmt = '{f}{last}'
+            elif any(known('first', token[:cut]) and known('last', token[cut:]) for cut in range(2, len(token) - 1)):
+                fmt = '{first}{last}'
+            elif known('first', token):
+                fmt = '{first}'
+            else:
+                fmt = '{token}'
+            resolved[fmt] = resolved.get(fmt, 0) + 1
+        return {fmt: round(total * n / len(sample)) for fmt, n in resolved.items()}
+
+    def summary(self) -> pd.DataFrame:
+        """One row per domain: volume, dominant format, confidence and the runner-up"""
+        rows = []
+        for domain, counts in self.counts.items():
+            formats = {fmt: n for fmt, n in counts.items() if fmt != '{token}'}
+            formats.update(self._resolve_tokens(domain))
+            addresses = sum(counts.values())
+            personal = {fmt: n for fmt, n in formats.items() if fmt not in NON_PERSONAL_FORMATS and n}
+            ranked = sorted(personal.items(), key=lambda item: item[1], reverse=True)
+            personal_total = sum(personal.values())
+
+            rows.append({
+                'domain': domain,
+                'addresses': addresses,
+                'personal_addresses': personal_total,
+                'dominant_format': ranked[0][0] if ranked else None,
+                'dominant_share': round(ranked[0][1] / personal_total, 3) if ranked else None,
+                'confidence': round(_wilson_lower_bound(ranked[0][1], personal_total), 3) if ranked else 0.0,
+                'second_format': ranked[1][0] if len(ranked) > 1 else None,
+                'role_accounts': formats.get('role', 0),
+                'formats': json.dumps(dict(sorted(formats.items(), key=lambda item: item[1], reverse=True)))
+            })
+
+        columns = ['domain', 'addresses', 'personal_addresses', 'dominant_format', 'dominant_share',
+                   'confidence', 'second_format', 'role_accounts', 'formats']
+        return pd.DataFrame(rows, columns=columns).sort_values('addresses', ascending=False, ignore_index=True)
+
+def _wilson_lower_bound(successes, total, z=1.96):
+    """Lower bound of the 95% Wilson score interval; small samples get low confidence"""
+    if not total:
+        return 0.0
+    p = successes / total
+    denominator = 1 + z * z / total
+    centre = p + z * z / (2 * total)
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total))
+    return (centre - margin) / denominator
+
+class EmailStreamWriter516:
+    """Appends analyzed chunks to an NDJSON or CSV file as they are produced"""
+    
+    def __init__(self, output_dir, output_format='ndjson'):
+        self.output_format = output_format
+        self._header_written = False
+        if output_format == 'csv':
+            os.makedirs(output_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.path = os.path.join(output_dir, f"bulk_email_stream_{timestamp}.csv")
+        else:
+            self.sink = NDJSONSink516.create(output_dir, "bulk_email_stream", '516 Hackers Email Analyzer')
+            self.path = self.sink.path
+    
+    def write_frame(self, frame):
+        """Append one chunk of rows"""
+        if self.output_format == 'csv':
+            if 'mx_records' in frame:
+                frame = frame.assign(mx_records=frame['mx_records'].map(lambda r: json.dumps(r) if r else ''))
+            frame.to_csv(self.path, mode='a', header=not self._header_written, index=False)
+            self._header_written = True
+        else:
+            # write_lines takes pre-serialized rows, so the tool stamp write() adds goes on the frame
+            frame = frame.assign(type='email', tool=self.sink.tool) if self.sink.tool else frame.assign(type='email')
+            self.sink.write_lines(frame.to_json(orient='records', lines=True), len(frame))
+    
+    def close(self, summary):
+        """Finish the output; CSV summaries go to a sidecar JSON file"""
+        if self.output_format == 'csv':
+            with open(self.path[:-len('.csv')] + '_summary.json', 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2, default=str)
+        else:
+            self.sink.close(summary)
+
 def main():
     parser = argparse.ArgumentParser(description='516 Hackers - Email Analyzer')
     parser.add_argument('email', nargs='?', help='Single email to analyze')
     parser.add_argument('-f', '--file', help='File containing list of emails')
+    parser.add_argument('--stream', action='store_true',
+                        help='High-volume mode: validate the file in chunks and stream rows to disk (- reads stdin)')
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson', help='Output format for --stream')
+    parser.add_argument('--chunksize', type=int, default=None, help='Lines per chunk for --stream')
+    parser.add_argument('--no-mx', action='store_true', help='Skip MX lookups in --stream mode')
+    parser.add_argument('--patterns', action='store_true',
+                        help='Corpus mode: per-domain address format table for the whole -f list')
     parser.add_argument('-o', '--output', default='outputs', help='Output directory')
     
     args = parser.parse_args()
@@ -143,6 +440,36 @@ def main():
         print(f"📨 MX Records: {len(result['mx_records'])} found")
         print(f"📁 Results saved to: {filename}")
     
+    elif args.file and args.patterns:
+        print(f"🔎 Inferring address formats from: {args.file}")
+        try:
+            table = analyzer.analyze_corpus(args.file, chunksize=args.chunksize)
+        except FileNotFoundError:
+            print(f"❌ File not found: {args.file}")
+            return
+        
+        filename = analyzer.export_utils.export_csv(table.to_dict('records'), "email_formats")
+        
+        print(f"✅ {int(table['addresses'].sum())} addresses across {len(table)} domains")
+        for row in table.head(10).itertuples():
+            print(f"   {row.domain:<30} {row.addresses:>8}  {row.dominant_format or '-':<18} confidence {row.confidence:.2f}")
+        print(f"📁 Format table saved to: {filename}")
+    
+    elif args.file and args.stream:
+        print(f"📁 Streaming emails from: {args.file}")
+        writer = EmailStreamWriter516(args.output, args.format)
+        try:
+            summary = analyzer.stream_analyze(args.file, writer, chunksize=args.chunksize, resolve_mx=not args.no_mx)
+        except FileNotFoundError:
+            print(f"❌ File not found: {args.file}")
+            return
+        
+        print(f"✅ Processed {summary['total_emails']} emails in {summary['elapsed_seconds']}s")
+        print(f"📧 Valid: {summary['valid_emails']}")
+        print(f"❌ Invalid: {summary['invalid_emails']}")
+        print(f"🌐 Unique domains: {summary['unique_domains']} ({summary['mx_lookups']} MX lookups)")
+        print(f"📁 Results streamed to: {writer.path}")
+    
     elif args.file:
         print(f"📁 Analyzing emails from file: {args.file}")
         try:
@@ -156,6 +483,8 @@ def main():
             print(f"📧 Valid: {results['valid_emails']}")
             print(f"❌ Invalid: {results['invalid_emails']}")
             print(f"🌐 Unique domains: {len(results['domains_found'])}")
+            if results['dns_cache']:
+                print(f"🗄️  DNS cache: {results['dns_cache']['hits']} hits, {results['dns_cache']['misses']} misses")
             print(f"📁 Results saved to: {filename}")
         
         except FileNotFoundError:
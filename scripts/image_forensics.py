@@ -5,83 +5,116 @@ Image analysis and comparison tool
 """
 
 import os
-import imagehash
 from PIL import Image
 import argparse
 import json
 from datetime import datetime
+from functools import partial
+from utils.config_loader import config
+from utils.hamming_index import HammingIndex516
+from utils.hash_matrix import HashMatrix516
+from utils.image_hashing import HASH_TYPES, hash_file
+from utils.image_index import ImageIndex516
+from utils.process_pool import map_files
 
 class ImageForensics516:
     def __init__(self, output_dir="outputs"):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
     
-    def calculate_hashes(self, image_path):
-        """Calculate multiple perceptual hashes for an image"""
+    def calculate_hashes(self, image_path, hash_types=HASH_TYPES):
+        """Calculate perceptual hashes for an image (all five unless hash_types narrows it)"""
         try:
-            with Image.open(image_path) as img:
-                return {
-                    'average_hash': str(imagehash.average_hash(img)),
-                    'phash': str(imagehash.phash(img)),
-                    'dhash': str(imagehash.dhash(img)),
-                    'whash': str(imagehash.whash(img)),
-                    'color_hash': str(imagehash.colorhash(img))
-                }
+            return {name: str(value) for name, value in hash_file(image_path, hash_types).items()}
         except Exception as e:
             return {'error': str(e)}
     
     def compare_images(self, image1_path, image2_path, threshold=10):
         """Compare two images and return similarity score"""
         try:
-            with Image.open(image1_path) as img1, Image.open(image2_path) as img2:
-                hash1 = imagehash.average_hash(img1)
-                hash2 = imagehash.average_hash(img2)
-                
-                difference = hash1 - hash2
-                similarity = max(0, 100 - (difference / 64) * 100)
-                
-                return {
-                    'image1': image1_path,
-                    'image2': image2_path,
-                    'hash_difference': int(difference),
-                    'similarity_percentage': round(similarity, 2),
-                    'is_similar': difference <= threshold
-                }
+            hash1 = hash_file(image1_path, ('average_hash',))['average_hash']
+            hash2 = hash_file(image2_path, ('average_hash',))['average_hash']
+            
+            difference = HashMatrix516([hash1, hash2]).distance(0, 1)
+            similarity = max(0, 100 - (difference / 64) * 100)
+            
+            return {
+                'image1': image1_path,
+                'image2': image2_path,
+                'hash_difference': int(difference),
+                'similarity_percentage': round(similarity, 2),
+                'is_similar': difference <= threshold
+            }
         except Exception as e:
             return {'error': str(e)}
     
-    def find_similar_images(self, directory_path, threshold=10):
-        """Find similar images in a directory"""
+    def find_similar_images(self, directory_path, threshold=10, index=None, workers=None):
+        """Find similar images in a directory
+        
+        Images are hashed on a pool of `workers` processes. With an
+        ImageIndex516, only new or changed files are hashed and the rest
+        come from the index.
+        """
         image_hashes = {}
         supported_formats = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp')
         
-        # Calculate hashes for all images
-        for filename in os.listdir(directory_path):
-            if filename.lower().endswith(supported_formats):
-                file_path = os.path.join(directory_path, filename)
-                hashes = self.calculate_hashes(file_path)
-                if 'error' not in hashes:
-                    image_hashes[filename] = hashes['average_hash']
+        if index is not None:
+            index.update_directory(directory_path, self.calculate_hashes, workers=workers)
+            directory = os.path.abspath(directory_path)
+            for path, value in index.entries('average_hash', directory_path):
+                if os.path.dirname(path) == directory:
+                    image_hashes[os.path.basename(path)] = format(value, '016x')
+        else:
+            # Calculate hashes for all images
+            paths = (
+                os.path.join(directory_path, filename) for filename in os.listdir(directory_path)
+                if filename.lower().endswith(supported_formats)
+            )
+            average_only = partial(self.calculate_hashes, hash_types=('average_hash',))
+            for file_path, hashes, error in map_files(average_only, paths, workers=workers, ordered=True):
+                if error is None and 'error' not in hashes:
+                    image_hashes[os.path.basename(file_path)] = hashes['average_hash']
         
-        # Find similar images
-        similar_pairs = []
-        processed = set()
+        # Find similar images: a Hamming index yields only the pairs within
+        # threshold instead of comparing every pair
+        hamming = HammingIndex516(bits=64, radius=threshold, expected_size=len(image_hashes))
+        entries = ((filename, int(hash_hex, 16)) for filename, hash_hex in image_hashes.items())
         
-        for img1, hash1 in image_hashes.items():
-            for img2, hash2 in image_hashes.items():
-                if img1 != img2 and (img2, img1) not in processed:
-                    difference = imagehash.hex_to_hash(hash1) - imagehash.hex_to_hash(hash2)
-                    if difference <= threshold:
-                        similar_pairs.append({
-                            'image1': img1,
-                            'image2': img2,
-                            'similarity_score': 100 - (difference / 64) * 100,
-                            'hash_difference': int(difference)
-                        })
-                    processed.add((img1, img2))
+        similar_pairs = []
+        for img1, img2, difference in hamming.pairs(entries):
+            similar_pairs.append({
+                'image1': img1,
+                'image2': img2,
+                'similarity_score': 100 - (difference / 64) * 100,
+                'hash_difference': difference
+            })
         
         return similar_pairs
     
+    def open_index(self, path=None):
+        """Open the persistent hash index (default outputs/image_index.sqlite)"""
+        path = path or os.path.join(self.output_dir, config.get('default', 'image_forensics.index_filename', 'image_index.sqlite'))
+        return ImageIndex516(path)
+    
+    def query_index(self, index, image_path, threshold=10, hash_type='average_hash'):
+        """Near matches for one image from the index, closest first"""
+        try:
+            hash_hex = str(hash_file(image_path, (hash_type,))[hash_type])
+        except Exception as e:
+            return {'error': str(e)}
+        
+        started = datetime.now()
+        matches = index.query(hash_hex, threshold, hash_type)
+        return {
+            'image': image_path,
+            'hash_type': hash_type,
+            'hash': hash_hex,
+            'threshold': threshold,
+            'indexed_images': len(index),
+            'query_ms': round((datetime.now() - started).total_seconds() * 1000, 2),
+            'matches': matches
+        }
+    
     def analyze_image_characteristics(self, image_path):
         """Analyze basic image characteristics"""
         try:
@@ -118,6 +151,7 @@ def main():
     # Hash command
     hash_parser = subparsers.add_parser('hash', help='Calculate image hashes')
     hash_parser.add_argument('image', help='Image file path')
+    hash_parser.add_argument('--hash-types', metavar='TYPES', help=f"Comma-separated subset of {','.join(HASH_TYPES)}")
     
     # Compare command
     compare_parser = subparsers.add_parser('compare', help='Compare two images')
@@ -129,13 +163,31 @@ def main():
     similar_parser = subparsers.add_parser('find-similar', help='Find similar images in directory')
     similar_parser.add_argument('directory', help='Directory to scan')
     similar_parser.add_argument('-t', '--threshold', type=int, default=10, help='Similarity threshold')
+    similar_parser.add_argument('--no-index', action='store_true', help='Re-hash every image instead of using the index')
+    similar_parser.add_argument('--workers', type=int, default=None, help='Hashing processes (default: one per core)')
+    similar_parser.add_argument('--db', help='Hash index path (default outputs/image_index.sqlite)')
+    
+    # Index command
+    index_parser = subparsers.add_parser('index', help='Add a directory to the persistent hash index')
+    index_parser.add_argument('directory', help='Directory to index')
+    index_parser.add_argument('-r', '--recursive', action='store_true', help='Include subdirectories')
+    index_parser.add_argument('--workers', type=int, default=None, help='Hashing processes (default: one per core)')
+    index_parser.add_argument('--db', help='Hash index path (default outputs/image_index.sqlite)')
+    
+    # Query command
+    query_parser = subparsers.add_parser('query', help='Find indexed images similar to one image')
+    query_parser.add_argument('image', help='Image file path')
+    query_parser.add_argument('-t', '--threshold', type=int, default=10, help='Similarity threshold')
+    query_parser.add_argument('--hash-type', choices=HASH_TYPES, default='average_hash', help='Hash to compare')
+    query_parser.add_argument('--db', help='Hash index path (default outputs/image_index.sqlite)')
     
     args = parser.parse_args()
     
     forensics = ImageForensics516()
     
     if args.command == 'hash':
-        hashes = forensics.calculate_hashes(args.image)
+        hash_types = args.hash_types.split(',') if args.hash_types else HASH_TYPES
+        hashes = forensics.calculate_hashes(args.image, hash_types)
         if 'error' in hashes:
             print(f"❌ Error: {hashes['error']}")
         else:
@@ -156,12 +208,36 @@ def main():
             print(f"📁 Saved to: {filename}")
     
     elif args.command == 'find-similar':
-        similar_images = forensics.find_similar_images(args.directory, args.threshold)
+        index = None if args.no_index else forensics.open_index(args.db)
+        similar_images = forensics.find_similar_images(args.directory, args.threshold, index=index, workers=args.workers)
+        if index is not None:
+            index.close()
         filename = forensics.save_analysis(similar_images, 'similar_images')
         print(f"✅ Found {len(similar_images)} similar image pairs")
         for pair in similar_images:
             print(f"   📸 {pair['image1']} ↔ {pair['image2']} ({pair['similarity_score']:.1f}%)")
         print(f"📁 Saved to: {filename}")
+    
+    elif args.command == 'index':
+        index = forensics.open_index(args.db)
+        stats = index.update_directory(args.directory, forensics.calculate_hashes, recursive=args.recursive,
+                                     workers=args.workers)
+        print(f"✅ Indexed {stats['scanned']} images: {stats['hashed']} hashed, {stats['unchanged']} unchanged, "
+              f"{stats['touched']} reused by content, {stats['removed']} removed, {stats['errors']} errors")
+        print(f"📁 Index: {index.path} ({len(index)} images)")
+        index.close()
+    
+    elif args.command == 'query':
+        index = forensics.open_index(args.db)
+        result = forensics.query_index(index, args.image, args.threshold, args.hash_type)
+        index.close()
+        if 'error' in result:
+            print(f"❌ Error: {result['error']}")
+        else:
+            print(f"✅ {len(result['matches'])} matches among {result['indexed_images']} indexed images "
+                  f"({result['query_ms']} ms)")
+            for match in result['matches']:
+                print(f"   📸 {match['path']} ({match['similarity_score']:.1f}%)")
 
 if __name__ == "__main__":
     main()
@@ -11,6 +11,7 @@ from PIL.ExifTags import TAGS
 import argparse
 import hashlib
 from datetime import datetime
+from utils.process_pool import map_files
 
 class MetadataAnalyzer516:
     def __init__(self, output_dir="outputs"):
@@ -64,15 +65,17 @@ class MetadataAnalyzer516:
                 hasher.update(chunk)
         return hasher.hexdigest()
     
-    def analyze_multiple(self, directory_path):
-        """Analyze all images in a directory"""
+    def analyze_multiple(self, directory_path, workers=None):
+        """Analyze all images in a directory on a pool of `workers` processes"""
         results = {}
         supported_formats = ('.jpg', '.jpeg', '.png', '.tiff', '.webp')
         
-        for filename in os.listdir(directory_path):
-            if filename.lower().endswith(supported_formats):
-                file_path = os.path.join(directory_path, filename)
-                results[filename] = self.extract_metadata(file_path)
+        paths = (
+            os.path.join(directory_path, filename) for filename in os.listdir(directory_path)
+            if filename.lower().endswith(supported_formats)
+        )
+        for file_path, metadata, error in map_files(self.extract_metadata, paths, workers=workers, ordered=True):
+            results[os.path.basename(file_path)] = metadata if error is None else {'error': str(error)}
         
         return results
     
@@ -95,6 +98,7 @@ def main():
     parser.add_argument('path', help='Image file or directory path')
     parser.add_argument('-c', '--clean', action='store_true', help='Clean metadata')
     parser.add_argument('-o', '--output', default='outputs', help='Output directory')
+    parser.add_argument('--workers', type=int, default=None, help='Processes for directory scans (default: one per core)')
     
     args = parser.parse_args()
     
@@ -118,7 +122,7 @@ def main():
                 print(f"📊 Found {len(metadata.get('metadata', {}))} metadata tags")
     
     elif os.path.isdir(args.path):
-        results = analyzer.analyze_multiple(args.path)
+        results = analyzer.analyze_multiple(args.path, workers=args.workers)
         filename = analyzer.save_analysis(results, "directory_scan")
         print(f"✅ Analyzed {len(results)} images")
         print(f"📁 Results saved to: {filename}")
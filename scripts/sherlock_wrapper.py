@@ -6,55 +6,126 @@ Extended version of Sherlock with additional features
 
 import os
 import json
-import asyncio
-import requests
 from datetime import datetime
 import argparse
+from utils.probe_engine import ProbeEngine516
+from utils.probe_cache import open_probe_cache
+from utils.platform_rules import compile_platform_rules, load_platform_rules
+from utils.scheduler import HostScheduler516
+from utils.helpers import read_targets
+from utils.result_stream import NDJSONSink516, group_probes
+
+# Sites checked by check_standard_sites. Platforms described in
+# config/social_platforms.json use that rule, so Sherlock516 and
+# SocialMediaMapper516 probe (and judge) them identically.
+STANDARD_SITE_URLS = {
+    'github': 'https://github.com/{}',
+    'twitter': 'https://twitter.com/{}',
+    'instagram': 'https://instagram.com/{}',
+    'linkedin': 'https://linkedin.com/in/{}',
+    'facebook': 'https://facebook.com/{}',
+    'youtube': 'https://youtube.com/@{}',
+    'reddit': 'https://reddit.com/user/{}'
+}
+
+_configured_rules = load_platform_rules()
+_fallback_rules = compile_platform_rules({site: {'url': url} for site, url in STANDARD_SITE_URLS.items()})
+STANDARD_SITES = {site: _configured_rules.get(site, _fallback_rules[site]) for site in STANDARD_SITE_URLS}
 
 class Sherlock516:
-    def __init__(self, username, output_dir="outputs"):
+    def __init__(self, username, output_dir="outputs", engine=None, refresh=False):
         self.username = username
         self.output_dir = output_dir
+        self.refresh = refresh
+        self._engine = engine
         self.results = {}
         self.found_profiles = []
         
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
     
-    def check_standard_sites(self):
-        """Check common social media platforms"""
-        sites = {
-            'github': f'https://github.com/{self.username}',
-            'twitter': f'https://twitter.com/{self.username}',
-            'instagram': f'https://instagram.com/{self.username}',
-            'linkedin': f'https://linkedin.com/in/{self.username}',
-            'facebook': f'https://facebook.com/{self.username}',
-            'youtube': f'https://youtube.com/@{self.username}',
-            'reddit': f'https://reddit.com/user/{self.username}'
-        }
+    @property
+    def engine(self):
+        """Probe engine, created on first use so rebuilt reports never open one"""
+        if self._engine is None:
+            self._engine = ProbeEngine516(cache=open_probe_cache(self.output_dir, self.refresh))
+        return self._engine
+    
+    def check_standard_sites(self, sink=None):
+        """Check common social media platforms concurrently"""
+        def record(site, outcome):
+            if sink is not None:
+                sink.write_probe(self.username, site, outcome)
+        
+        outcomes = self.engine.probe_rules(STANDARD_SITES, self.username, on_result=record)
+        self._record_outcomes(outcomes)
+    
+    @classmethod
+    def stream_bulk(cls, usernames, sink, output_dir="outputs", engine=None, refresh=False):
+        """Bulk sweep that streams every probe to sink instead of keeping it in memory"""
+        engine = engine or ProbeEngine516(cache=open_probe_cache(output_dir, refresh))
+        counts = {'probes': 0, 'found': 0}
+        found_usernames = set()
         
-        for site, url in sites.items():
-            try:
-                response = requests.get(url, timeout=10)
-                if response.status_code == 200:
-                    self.results[site] = {
-                        'url': url,
-                        'status': 'Found',
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    self.found_profiles.append(site)
+        def record(username, site, outcome):
+            sink.write_probe(username, site, outcome)
+            counts['probes'] += 1
+            if outcome['exists']:
+                counts['found'] += 1
+                found_usernames.add(username)
+                print(f"✅ {username} found on {site}: {outcome['url']}")
+        
+        jobs = ((username, rule) for username in usernames for rule in STANDARD_SITES.values())
+        HostScheduler516(engine).run(jobs, on_result=record, collect=False)
+        
+        summary = {
+            'usernames': len(usernames),
+            'platforms': list(STANDARD_SITES),
+            'probes': counts['probes'],
+            'profiles_found': counts['found'],
+            'usernames_with_profiles': len(found_usernames)
+        }
+        sink.close(summary)
+        return summary
+    
+    @classmethod
+    def from_stream(cls, stream_path, output_dir="outputs"):
+        """Rebuild one investigator per username from an NDJSON probe stream"""
+        investigators = []
+        for username, outcomes in group_probes(stream_path).items():
+            investigator = cls(username, output_dir)
+            investigator._record_outcomes(outcomes, announce=False)
+            investigators.append(investigator)
+        return investigators
+    
+    def _record_outcomes(self, outcomes, announce=True):
+        """Fill results and found_profiles from probe outcomes"""
+        for site in STANDARD_SITES:
+            if site not in outcomes:
+                continue
+            outcome = outcomes[site]
+            url = outcome['url']
+            timestamp = outcome.get('timestamp') or datetime.now().isoformat()
+            if 'error' in outcome:
+                self.results[site] = {
+                    'url': url,
+                    'status': f"Error: {outcome['error']}",
+                    'timestamp': timestamp
+                }
+            elif outcome['exists']:
+                self.results[site] = {
+                    'url': url,
+                    'status': 'Found',
+                    'timestamp': timestamp
+                }
+                self.found_profiles.append(site)
+                if announce:
                     print(f"✅ Found on {site}: {url}")
-                else:
-                    self.results[site] = {
-                        'url': url,
-                        'status': 'Not found',
-                        'timestamp': datetime.now().isoformat()
-                    }
-            except Exception as e:
+            else:
                 self.results[site] = {
                     'url': url,
-                    'status': f'Error: {str(e)}',
-                    'timestamp': datetime.now().isoformat()
+                    'status': 'Not found',
+                    'timestamp': timestamp
                 }
     
     def save_results(self):
@@ -82,20 +153,47 @@ Found on: {', '.join(self.found_profiles) if self.found_profiles else 'None'}
 
 def main():
     parser = argparse.ArgumentParser(description='516 Digital Investigation Tools - Username Investigation')
-    parser.add_argument('username', help='Username to search for')
+    parser.add_argument('username', nargs='?', help='Username to search for')
+    parser.add_argument('-f', '--file', help='File with one username per line (- for stdin)')
     parser.add_argument('-o', '--output', default='outputs', help='Output directory')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached probe results')
+    parser.add_argument('--from-stream', metavar='NDJSON', help='Rebuild reports from a saved result stream')
     
     args = parser.parse_args()
     
-    investigator = Sherlock516(args.username, args.output)
-    print(f"🔍 516 Digital Investigation Tools - Searching for username: {args.username}")
+    if args.from_stream:
+        for investigator in Sherlock516.from_stream(args.from_stream, args.output):
+            print(investigator.generate_report())
     
-    investigator.check_standard_sites()
-    output_file = investigator.save_results()
-    report = investigator.generate_report()
+    elif args.username:
+        investigator = Sherlock516(args.username, args.output, refresh=args.refresh)
+        print(f"🔍 516 Digital Investigation Tools - Searching for username: {args.username}")
+        
+        investigator.check_standard_sites()
+        output_file = investigator.save_results()
+        report = investigator.generate_report()
+        
+        print(report)
+        print(f"📁 Results saved to: {output_file}")
+    
+    elif args.file:
+        try:
+            usernames = read_targets(args.file)
+        except FileNotFoundError:
+            print(f"❌ File not found: {args.file}")
+            return
+        
+        print(f"🔍 516 Digital Investigation Tools - Searching for {len(usernames)} usernames")
+        
+        sink = NDJSONSink516.create(args.output, "username_search_bulk", '516 Digital Investigation Tools - Sherlock516')
+        summary = Sherlock516.stream_bulk(usernames, sink, args.output, refresh=args.refresh)
+        
+        print(f"✅ Processed {summary['usernames']} usernames, "
+              f"{summary['usernames_with_profiles']} with at least one profile")
+        print(f"📁 Results streamed to: {sink.path}")
     
-    print(report)
-    print(f"📁 Results saved to: {output_file}")
+    else:
+        print("❌ Please provide a username or file with -f option")
 
 if __name__ == "__main__":
     main()
@@ -5,151 +5,105 @@ Cross-platform social media analysis
 """
 
 import json
-import requests
 from datetime import datetime
 import argparse
 import os
+from utils.config_loader import config
+from utils.platform_rules import load_platform_rules
+from utils.probe_engine import ProbeEngine516
+from utils.probe_cache import open_probe_cache
+from utils.scheduler import HostScheduler516
+from utils.helpers import read_targets
+from utils.result_stream import NDJSONSink516, group_probes
 
 class SocialMediaMapper516:
-    def __init__(self, output_dir="outputs"):
+    def __init__(self, output_dir="outputs", engine=None, refresh=False):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
         
+        self.engine = engine or ProbeEngine516(cache=open_probe_cache(output_dir, refresh))
+        
+        # Platforms come from config/social_platforms.json, minus any
+        # switched off through social_media.enable_<platform>
         self.platforms = {
-            'github': {
-                'url': 'https://github.com/{}',
-                'check': self._check_github
-            },
-            'twitter': {
-                'url': 'https://twitter.com/{}',
-                'check': self._check_twitter
-            },
-            'instagram': {
-                'url': 'https://instagram.com/{}',
-                'check': self._check_instagram
-            },
-            'linkedin': {
-                'url': 'https://linkedin.com/in/{}',
-                'check': self._check_linkedin
-            },
-            'reddit': {
-                'url': 'https://reddit.com/user/{}',
-                'check': self._check_reddit
-            },
-            'youtube': {
-                'url': 'https://youtube.com/@{}/',
-                'check': self._check_youtube
-            }
+            key: rule for key, rule in load_platform_rules().items()
+            if config.get('default', f'social_media.enable_{key}', True)
         }
     
-    def map_presence(self, username):
+    def map_presence(self, username, sink=None):
         """Map social media presence for a username"""
-        results = {
-            'username': username,
-            'timestamp': datetime.now().isoformat(),
-            'platforms': {}
-        }
+        def record(platform, outcome):
+            if sink is not None:
+                sink.write_probe(username, platform, outcome)
         
-        found_count = 0
+        print(f"🔍 Checking {len(self.platforms)} platforms...")
+        outcomes = self.engine.probe_rules(self.platforms, username, on_result=record)
         
-        for platform, info in self.platforms.items():
-            print(f"🔍 Checking {platform}...")
-            platform_result = info['check'](username, info['url'])
-            results['platforms'][platform] = platform_result
-            
+        for platform, platform_result in outcomes.items():
             if platform_result['exists']:
-                found_count += 1
                 print(f"   ✅ Found on {platform}")
             else:
                 print(f"   ❌ Not found on {platform}")
         
+        return self._summarize(username, outcomes)
+    
+    def stream_presence_bulk(self, usernames, sink):
+        """Bulk sweep that streams every probe to sink instead of keeping it in memory"""
+        counts = {'probes': 0, 'found': 0}
+        found_usernames = set()
+        
+        def record(username, platform, outcome):
+            sink.write_probe(username, platform, outcome)
+            counts['probes'] += 1
+            if outcome['exists']:
+                counts['found'] += 1
+                found_usernames.add(username)
+                print(f"   ✅ {username} found on {platform}")
+        
+        print(f"🔍 Checking {len(usernames)} usernames across {len(self.platforms)} platforms...")
+        scheduler = HostScheduler516(self.engine)
+        jobs = ((username, rule) for username in usernames for rule in self.platforms.values())
+        scheduler.run(jobs, on_result=record, collect=False)
+        
+        summary = {
+            'usernames': len(usernames),
+            'platforms': list(self.platforms),
+            'probes': counts['probes'],
+            'profiles_found': counts['found'],
+            'usernames_with_profiles': len(found_usernames)
+        }
+        sink.close(summary)
+        return summary
+    
+    def load_results(self, stream_path):
+        """Rebuild per-username result documents from an NDJSON probe stream"""
+        return [
+            self._summarize(username, outcomes)
+            for username, outcomes in group_probes(stream_path).items()
+        ]
+    
+    def _summarize(self, username, outcomes):
+        """Assemble the per-username result document from probe outcomes"""
+        ordered = [platform for platform in self.platforms if platform in outcomes]
+        ordered += [platform for platform in outcomes if platform not in self.platforms]
+        
+        results = {
+            'username': username,
+            'timestamp': datetime.now().isoformat(),
+            'platforms': {platform: outcomes[platform] for platform in ordered}
+        }
+        
+        checked = len(results['platforms'])
+        found_count = sum(1 for data in results['platforms'].values() if data['exists'])
+        
         results['summary'] = {
-            'total_platforms_checked': len(self.platforms),
+            'total_platforms_checked': checked,
             'platforms_found': found_count,
-            'discovery_rate': round((found_count / len(self.platforms)) * 100, 2)
+            'discovery_rate': round((found_count / checked) * 100, 2) if checked else 0
         }
         
         return results
     
-    def _check_github(self, username, url_pattern):
-        """Check GitHub presence"""
-        try:
-            url = url_pattern.format(username)
-            response = requests.get(url, timeout=10)
-            return {
-                'url': url,
-                'exists': response.status_code == 200,
-                'response_time': response.elapsed.total_seconds()
-            }
-        except:
-            return {'url': url_pattern.format(username), 'exists': False, 'error': 'Request failed'}
-    
-    def _check_twitter(self, username, url_pattern):
-        """Check Twitter presence"""
-        try:
-            url = url_pattern.format(username)
-            response = requests.get(url, timeout=10)
-            return {
-                'url': url,
-                'exists': response.status_code == 200,
-                'response_time': response.elapsed.total_seconds()
-            }
-        except:
-            return {'url': url_pattern.format(username), 'exists': False, 'error': 'Request failed'}
-    
-    def _check_instagram(self, username, url_pattern):
-        """Check Instagram presence"""
-        try:
-            url = url_pattern.format(username)
-            response = requests.get(url, timeout=10)
-            return {
-                'url': url,
-                'exists': response.status_code == 200,
-                'response_time': response.elapsed.total_seconds()
-            }
-        except:
-            return {'url': url_pattern.format(username), 'exists': False, 'error': 'Request failed'}
-    
-    def _check_linkedin(self, username, url_pattern):
-        """Check LinkedIn presence"""
-        try:
-            url = url_pattern.format(username)
-            response = requests.get(url, timeout=10)
-            # LinkedIn might return 999 for some cases
-            return {
-                'url': url,
-                'exists': response.status_code in [200, 999],
-                'response_time': response.elapsed.total_seconds()
-            }
-        except:
-            return {'url': url_pattern.format(username), 'exists': False, 'error': 'Request failed'}
-    
-    def _check_reddit(self, username, url_pattern):
-        """Check Reddit presence"""
-        try:
-            url = url_pattern.format(username)
-            response = requests.get(url, timeout=10)
-            return {
-                'url': url,
-                'exists': response.status_code == 200,
-                'response_time': response.elapsed.total_seconds()
-            }
-        except:
-            return {'url': url_pattern.format(username), 'exists': False, 'error': 'Request failed'}
-    
-    def _check_youtube(self, username, url_pattern):
-        """Check YouTube presence"""
-        try:
-            url = url_pattern.format(username)
-            response = requests.get(url, timeout=10)
-            return {
-                'url': url,
-                'exists': response.status_code == 200,
-                'response_time': response.elapsed.total_seconds()
-            }
-        except:
-            return {'url': url_pattern.format(username), 'exists': False, 'error': 'Request failed'}
-    
     def generate_report(self, results):
         """Generate a comprehensive report"""
         report = f"""
@@ -194,22 +148,51 @@ Detailed Results:
 
 def main():
     parser = argparse.ArgumentParser(description='516 Hackers - Social Media Mapper')
-    parser.add_argument('username', help='Username to search across social media')
+    parser.add_argument('username', nargs='?', help='Username to search across social media')
+    parser.add_argument('-f', '--file', help='File with one username per line (- for stdin)')
     parser.add_argument('-o', '--output', default='outputs', help='Output directory')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached probe results')
+    parser.add_argument('--from-stream', metavar='NDJSON', help='Rebuild reports from a saved result stream')
     
     args = parser.parse_args()
     
-    print(f"🌐 516 Hackers - Mapping social media presence for: {args.username}")
-    print("=" * 60)
+    mapper = SocialMediaMapper516(args.output, refresh=args.refresh)
+    
+    if args.from_stream:
+        for results in mapper.load_results(args.from_stream):
+            print(mapper.generate_report(results))
     
-    mapper = SocialMediaMapper516(args.output)
-    results = mapper.map_presence(args.username)
+    elif args.username:
+        print(f"🌐 516 Hackers - Mapping social media presence for: {args.username}")
+        print("=" * 60)
+        
+        results = mapper.map_presence(args.username)
+        
+        report = mapper.generate_report(results)
+        filename = mapper.save_results(results, args.username)
+        
+        print(report)
+        print(f"📁 Full results saved to: {filename}")
     
-    report = mapper.generate_report(results)
-    filename = mapper.save_results(results, args.username)
+    elif args.file:
+        try:
+            usernames = read_targets(args.file)
+        except FileNotFoundError:
+            print(f"❌ File not found: {args.file}")
+            return
+        
+        print(f"🌐 516 Hackers - Bulk mapping {len(usernames)} usernames")
+        print("=" * 60)
+        
+        sink = NDJSONSink516.create(args.output, "social_map_bulk", '516 Hackers Social Media Mapper')
+        summary = mapper.stream_presence_bulk(usernames, sink)
+        
+        print(f"✅ Processed {summary['usernames']} usernames, "
+              f"{summary['usernames_with_profiles']} with at least one profile")
+        print(f"📁 Results streamed to: {sink.path}")
     
-    print(report)
-    print(f"📁 Full results saved to: {filename}")
+    else:
+        print("❌ Please provide a username or file with -f option")
 
 if __name__ == "__main__":
     main()
@@ -36,6 +36,7 @@ setup(
             'social516=scripts.social_media_mapper:main',
             'email516=scripts.email_analyzer:main',
             'domain516=scripts.domain_research:main',
+            'monitor516=scripts.domain_monitor:main',
             'report516=scripts.report_generator:main',
         ],
     },
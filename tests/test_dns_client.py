@@ -0,0 +1,191 @@
+"""
+516 Hackers - Tests for the DNS Client
+"""
+
+import unittest
+import asyncio
+import os
+import tempfile
+import time
+import dns.rdata
+import dns.rdataclass
+import dns.rdatatype
+from utils.dns_cache import DNSCache516
+from utils.dns_client import DNSClient516, _rdata_to_dict
+
+class _StubDNSClient516(DNSClient516):
+    """Answers from a fixed table after a per-type delay"""
+
+    def __init__(self, answers, delays):
+        super().__init__()
+        self.answers = answers
+        self.delays = delays
+        self.cancelled = []
+
+    async def query_one_async(self, domain, record_type):
+        try:
+            await asyncio.sleep(self.delays.get(record_type, 0.0))
+        except asyncio.CancelledError:
+            self.cancelled.append(record_type)
+            raise
+        return self.answers[record_type]
+
+class TestDNSClient516(unittest.TestCase):
+
+    def test_types_resolve_concurrently(self):
+        """Total time tracks the slowest record type"""
+        answer = {'status': 'NOERROR', 'ttl': 300, 'records': ['192.0.2.1']}
+        client = _StubDNSClient516({t: answer for t in ('A', 'AAAA', 'MX')}, {'A': 0.2, 'AAAA': 0.2, 'MX': 0.2})
+
+        started = time.monotonic()
+        results = client.query('example.com', ['A', 'AAAA', 'MX'])
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(list(results), ['A', 'AAAA', 'MX'])
+        self.assertEqual(results['MX']['ttl'], 300)
+
+    def test_nxdomain_short_circuits(self):
+        """The first NXDOMAIN cancels the queries still in flight"""
+        nxdomain = {'status': 'NXDOMAIN', 'ttl': 900, 'records': []}
+        client = _StubDNSClient516(
+            {'A': nxdomain, 'MX': {'status': 'NOERROR', 'ttl': 60, 'records': []}},
+            {'A': 0.0, 'MX': 5.0}
+        )
+
+        started = time.monotonic()
+        results = client.query('missing.example', ['A', 'MX'])
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(client.cancelled, ['MX'])
+        self.assertEqual(results['MX']['status'], 'NXDOMAIN')
+        self.assertTrue(results['MX']['short_circuited'])
+
+    def test_structured_records(self):
+        """MX, CAA and SRV answers come back as fields rather than text"""
+        def rdata(rdtype, text):
+            return dns.rdata.from_text(dns.rdataclass.IN, dns.rdatatype.from_text(rdtype), text)
+
+        self.assertEqual(_rdata_to_dict(rdata('MX', '10 mail.example.com.')),
+                         {'preference': 10, 'exchange': 'mail.example.com.'})
+        self.assertEqual(_rdata_to_dict(rdata('CAA', '0 issue "letsencrypt.org"')),
+                         {'flags': 0, 'tag': 'issue', 'value': 'letsencrypt.org'})
+        self.assertEqual(_rdata_to_dict(rdata('SRV', '5 10 5060 sip.example.com.'))['port'], 5060)
+        self.assertEqual(_rdata_to_dict(rdata('TXT', '"v=spf1 -all"')), 'v=spf1 -all')
+
+class _CountingDNSClient516(DNSClient516):
+    """Counts wire queries and answers them from a fixed table"""
+
+    def __init__(self, answers, cache):
+        super().__init__(cache=cache)
+        self.answers = answers
+        self.wire_queries = 0
+
+    async def _resolve(self, domain, record_type):
+        self.wire_queries += 1
+        return dict(self.answers[record_type])
+
+class _ReverseDNSClient516(DNSClient516):
+    """PTR answers after a per-name delay"""
+
+    def __init__(self, delays, cache=None):
+        super().__init__(cache=cache)
+        self.delays = delays
+        self.wire_queries = 0
+
+    async def _resolve(self, name, record_type):
+        self.wire_queries += 1
+        await asyncio.sleep(self.delays.get(name, 0.0))
+        return {'status': 'NOERROR', 'ttl': 3600, 'records': [f"host-{name.split('.')[0]}.example.net."]}
+
+class TestReverseLookups516(unittest.TestCase):
+
+    def test_reverse_lookups_share_a_deadline(self):
+        """All PTR queries run at once; stragglers past the deadline time out"""
+        client = _ReverseDNSClient516({'1.2.0.192.in-addr.arpa.': 0.2, '2.2.0.192.in-addr.arpa.': 0.2,
+                                       '3.2.0.192.in-addr.arpa.': 5.0})
+
+        started = time.monotonic()
+        results = client.reverse(['192.0.2.1', '192.0.2.2', '192.0.2.3', 'not-an-ip'], deadline=0.5)
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(results['192.0.2.1']['records'], ['host-1.example.net.'])
+        self.assertEqual(results['192.0.2.3']['status'], 'TIMEOUT')
+        self.assertEqual(results['not-an-ip']['status'], 'ERROR')
+
+    def test_shared_addresses_are_cached(self):
+        """An address seen for a second domain is not queried again"""
+        client = _ReverseDNSClient516({}, cache=DNSCache516())
+
+        client.reverse(['192.0.2.10', '2001:db8::1'])
+        results = client.reverse(['192.0.2.10'])
+
+        self.assertEqual(client.wire_queries, 2)
+        self.assertTrue(results['192.0.2.10']['cached'])
+
+class TestDNSCache516(unittest.TestCase):
+
+    def test_repeat_lookups_hit_the_cache(self):
+        """The same MX lookup goes to the wire once per TTL"""
+        cache = DNSCache516()
+        client = _CountingDNSClient516({'MX': {'status': 'NOERROR', 'ttl': 300, 'records': []}}, cache)
+
+        for _ in range(5):
+            answer = client.resolve('Gmail.com', 'MX')
+
+        self.assertEqual(client.wire_queries, 1)
+        self.assertTrue(answer['cached'])
+        self.assertEqual(cache.stats()['hits'], 4)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_ttl_expiry(self):
+        """Entries vanish once their TTL has run out"""
+        cache = DNSCache516()
+        cache.put('example.com', 'A', {'status': 'NOERROR', 'ttl': 1, 'records': ['192.0.2.1']})
+        self.assertIsNotNone(cache.get('example.com', 'A'))
+
+        time.sleep(1.1)
+        self.assertIsNone(cache.get('example.com', 'A'))
+        self.assertEqual(cache.stats()['expired'], 1)
+
+    def test_negative_caching(self):
+        """NXDOMAIN covers every type; negative answers without an SOA TTL are skipped"""
+        cache = DNSCache516()
+        cache.put('missing.example', 'A', {'status': 'NXDOMAIN', 'ttl': 900, 'records': []})
+        cache.put('nosoa.example', 'MX', {'status': 'NOANSWER', 'ttl': None, 'records': []})
+        cache.put('broken.example', 'A', {'status': 'SERVFAIL', 'ttl': None, 'records': []})
+
+        self.assertEqual(cache.get('missing.example', 'MX')['status'], 'NXDOMAIN')
+        self.assertIsNone(cache.get('nosoa.example', 'MX'))
+        self.assertIsNone(cache.get('broken.example', 'A'))
+        self.assertEqual(cache.stats()['negative_hits'], 1)
+
+    def test_lru_eviction(self):
+        """The least recently used entry goes first"""
+        cache = DNSCache516(max_entries=2)
+        answer = {'status': 'NOERROR', 'ttl': 300, 'records': []}
+        cache.put('a.example', 'A', answer)
+        cache.put('b.example', 'A', answer)
+        cache.get('a.example', 'A')
+        cache.put('c.example', 'A', answer)
+
+        self.assertIsNotNone(cache.get('a.example', 'A'))
+        self.assertIsNone(cache.get('b.example', 'A'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_disk_store_survives_restart(self):
+        """A persisted answer is served by a fresh cache instance"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'dns_cache.sqlite')
+            first = DNSCache516(path=path)
+            first.put('example.com', 'MX', {'status': 'NOERROR', 'ttl': 300, 'records': [{'preference': 10, 'exchange': 'mx.example.com.'}]})
+            first.close()
+
+            second = DNSCache516(path=path)
+            answer = second.get('example.com', 'MX')
+            second.close()
+
+        self.assertEqual(answer['records'][0]['preference'], 10)
+        self.assertLessEqual(answer['ttl'], 300)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+516 Hackers - Tests for the Domain Monitor
+"""
+
+import unittest
+import os
+import tempfile
+from scripts.domain_research import DomainResearch516
+from scripts.domain_monitor import DomainMonitor516, SnapshotStore516
+
+class _ScriptedResearch516(DomainResearch516):
+    """Facet answers come from a mutable table and every stage call is counted"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self.mx = 'mx1.example.com.'
+        self.addresses = ['192.0.2.1', '192.0.2.2']
+        self.dns_status = 'NOERROR'
+
+    def get_whois_info(self, domain, deadline=None):
+        self.calls.append('whois_info')
+        return {'registrar': 'Example Registrar', 'cached': False}
+
+    def get_dns_info(self, domain):
+        self.calls.append('dns_info')
+        if self.dns_status != 'NOERROR':
+            return {'MX': {'status': self.dns_status, 'ttl': None, 'records': []},
+                    'A': {'status': self.dns_status, 'ttl': None, 'records': []}}
+        return {'MX': {'status': 'NOERROR', 'ttl': 300,
+                       'records': [{'preference': 10, 'exchange': self.mx}, {'preference': 20, 'exchange': 'mx9.example.com.'}]}}
+
+    def check_http_headers(self, domain):
+        self.calls.append('http_headers')
+        return {'error': 'connection refused'}
+
+    def get_ip_info(self, domain):
+        self.calls.append('ip_info')
+        return {
+            'ip_address': self.addresses[0],
+            'resolved_at': str(len(self.calls)),
+            'addresses': [{'ip_address': address, 'version': 4} for address in self.addresses]
+        }
+
+class TestDomainMonitor516(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore516(os.path.join(self.tmp.name, 'snapshots.sqlite'))
+        self.research = _ScriptedResearch516()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_only_stale_facets_are_requeried(self):
+        """Fresh facets are skipped; failed ones are retried on the next run"""
+        monitor = DomainMonitor516(self.store, self.research)
+        first = monitor.check('example.com')
+        self.research.calls = []
+        second = monitor.check('example.com')
+
+        self.assertTrue(first['new'])
+        self.assertEqual(self.research.calls, ['http_headers'])
+        self.assertEqual(second['refreshed'], ['http_headers'])
+        self.assertEqual(second['changes'], [])
+        self.assertIn('http_headers', second['errors'])
+
+    def test_change_record_lists_differences(self):
+        """An expired facet with a new value yields a compact change entry"""
+        monitor = DomainMonitor516(self.store, self.research, freshness={'dns_info': 0, 'ip_info': 0})
+        monitor.check('example.com')
+        self.research.mx = 'mx2.example.com.'
+        record = monitor.check('example.com')
+
+        self.assertEqual(sorted(record['refreshed']), ['dns_info', 'http_headers', 'ip_info'])
+        # resolved_at changed too, but volatile keys are not reported
+        self.assertEqual(len(record['changes']), 1)
+        change = record['changes'][0]
+        self.assertEqual((change['facet'], change['path']), ('dns_info', 'MX.records'))
+        self.assertEqual(change['new'][0]['exchange'], 'mx2.example.com.')
+
+    def test_answer_order_is_not_a_change(self):
+        """Round-robin DNS reordering addresses and MX records reports nothing"""
+        monitor = DomainMonitor516(self.store, self.research, freshness={'dns_info': 0, 'ip_info': 0})
+        monitor.check('example.com')
+        self.research.addresses.reverse()
+        record = monitor.check('example.com')
+
+        self.assertEqual(record['changes'], [])
+
+    def test_failed_dns_keeps_the_last_snapshot(self):
+        """A run where every lookup timed out is an error, not a change, and is not saved"""
+        monitor = DomainMonitor516(self.store, self.research, freshness={'dns_info': 0})
+        monitor.check('example.com')
+        self.research.dns_status = 'TIMEOUT'
+        failed = monitor.check('example.com')
+        self.research.dns_status = 'NOERROR'
+        recovered = monitor.check('example.com')
+
+        self.assertIn('dns_info', failed['errors'])
+        self.assertEqual(failed['changes'], [])
+        self.assertEqual(recovered['changes'], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+516 Hackers - Tests for Domain Research
+"""
+
+import unittest
+import os
+import tempfile
+import time
+from scripts.domain_research import DomainResearch516, completed_domains
+from utils.result_stream import NDJSONSink516, read_stream
+
+class _StubResearch516(DomainResearch516):
+    """Replaces the network stages with fixed delays"""
+
+    delays = {'whois': 0.3, 'dns': 0.3, 'http': 0.3, 'ip': 0.3}
+
+    def get_whois_info(self, domain, deadline=None):
+        time.sleep(self.delays['whois'])
+        return {'domain_name': domain}
+
+    def get_dns_info(self, domain):
+        time.sleep(self.delays['dns'])
+        return {'A': ['192.0.2.1']}
+
+    def check_http_headers(self, domain):
+        time.sleep(self.delays['http'])
+        return {'error': 'connection refused'}
+
+    def get_ip_info(self, domain):
+        time.sleep(self.delays['ip'])
+        return {'ip_address': '192.0.2.1'}
+
+class TestDomainResearch516(unittest.TestCase):
+
+    def test_stages_run_concurrently(self):
+        """Total time tracks the slowest stage, not the sum"""
+        results = _StubResearch516().comprehensive_analysis('example.com')
+
+        self.assertLess(results['total_seconds'], 0.9)
+        self.assertFalse(results['partial'])
+        self.assertEqual(results['dns_info'], {'A': ['192.0.2.1']})
+        self.assertEqual(results['stage_timings']['http_headers']['status'], 'error')
+        self.assertEqual(results['stage_timings']['whois_info']['status'], 'ok')
+
+    def test_slow_stage_yields_partial_results(self):
+        """A stage past its timeout is reported while the rest come back"""
+        research = _StubResearch516()
+        research.delays = dict(_StubResearch516.delays, whois=2.0)
+
+        results = research.comprehensive_analysis('example.com', stage_timeouts={'whois_info': 0.5})
+
+        self.assertTrue(results['partial'])
+        self.assertEqual(results['stage_timings']['whois_info']['status'], 'timeout')
+        self.assertIn('error', results['whois_info'])
+        self.assertEqual(results['ip_info'], {'ip_address': '192.0.2.1'})
+        self.assertLess(results['total_seconds'], 1.0)
+
+    def test_bulk_streams_one_record_per_domain(self):
+        """Domains share a bounded pool and land in a single stream"""
+        domains = [f"site{i}.example" for i in range(8)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = NDJSONSink516(os.path.join(tmp, 'bulk.ndjson'))
+            summary = _StubResearch516().research_bulk(domains, sink, workers=4)
+            records = list(read_stream(sink.path, 'domain'))
+
+        self.assertEqual(summary['analyzed'], 8)
+        # Two waves of four concurrent 0.3s analyses
+        self.assertLess(summary['elapsed_seconds'], 1.2)
+        self.assertEqual(sorted(r['domain'] for r in records), sorted(domains))
+
+    def test_bulk_resume_skips_finished_domains(self):
+        """A resumed run only analyzes domains missing from the stream"""
+        domains = ['a.example', 'b.example', 'c.example']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bulk.ndjson')
+            _StubResearch516().research_bulk(domains[:2], NDJSONSink516(path), workers=2)
+
+            summary = _StubResearch516().research_bulk(domains, NDJSONSink516(path), workers=2,
+                                                       completed=completed_domains(path))
+            records = list(read_stream(path, 'domain'))
+
+        self.assertEqual(summary['skipped'], 2)
+        self.assertEqual(summary['analyzed'], 1)
+        self.assertEqual(sorted(r['domain'] for r in records), domains)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+516 Hackers - Tests for the Email Analyzer
+"""
+
+import unittest
+import asyncio
+import os
+import tempfile
+import time
+import pandas as pd
+from scripts.email_analyzer import EmailAnalyzer516, EmailStreamWriter516, EmailPatternStats516
+from utils.dns_client import DNSClient516
+from utils.result_stream import read_stream
+
+class _SlowMXClient516(DNSClient516):
+    """Answers MX queries after a fixed delay and records every domain asked"""
+
+    def __init__(self):
+        super().__init__()
+        self.queried = []
+
+    async def query_one_async(self, domain, record_type):
+        self.queried.append(domain)
+        await asyncio.sleep(0.2)
+        return {'status': 'NOERROR', 'ttl': 300, 'records': [{'preference': 10, 'exchange': f"mx.{domain}."}]}
+
+class TestEmailAnalyzer516(unittest.TestCase):
+
+    def test_bulk_resolves_each_domain_once(self):
+        """MX lookups run once per distinct domain, concurrently, and fan back out"""
+        analyzer = EmailAnalyzer516()
+        analyzer.dns_client = _SlowMXClient516()
+        emails = [f"user{i}@gmail.com" for i in range(50)] + ['a@Outlook.com', 'b@outlook.com', 'c@corp.example', 'not-an-email']
+
+        started = time.monotonic()
+        results = analyzer.bulk_analyze(emails)
+
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertEqual(sorted(analyzer.dns_client.queried), ['corp.example', 'gmail.com', 'outlook.com'])
+        self.assertEqual(results['mx_lookups'], 3)
+        self.assertEqual(results['valid_emails'], 53)
+        self.assertEqual(results['analysis_results'][50]['mx_records'][0]['exchange'], 'mx.outlook.com.')
+        self.assertEqual(results['analysis_results'][-1]['mx_records'], [])
+
+    def test_stream_matches_per_address_checks(self):
+        """Chunked vectorized validation agrees with _check_syntax and streams every row"""
+        analyzer = EmailAnalyzer516()
+        analyzer.dns_client = _SlowMXClient516()
+        emails = ['first.last@gmail.com', 'bad, "line', 'x@corp.example', '', 'nobody@', 'a_b@GMAIL.com', 'plain@outlook.com']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'emails.txt')
+            with open(source, 'w') as f:
+                f.write('\n'.join(emails) + '\n')
+
+            writer = EmailStreamWriter516(tmp)
+            summary = analyzer.stream_analyze(source, writer, chunksize=3)
+            rows = list(read_stream(writer.path, 'email'))
+
+        self.assertEqual(summary['total_emails'], 6)
+        self.assertEqual(summary['valid_emails'], 4)
+        # gmail.com appears in two chunks but is one unique domain
+        self.assertEqual(summary['unique_domains'], 3)
+        for row in rows:
+            expected = analyzer._check_syntax(row['email'])
+            self.assertEqual(row['is_valid_format'], expected['is_valid_format'])
+            if expected['is_valid_format']:
+                self.assertEqual(row['has_special_chars'], expected['syntax_analysis']['has_special_chars'])
+                self.assertEqual(row['mx_count'], 1)
+
+    def _stream(self, text, chunksize):
+        analyzer = EmailAnalyzer516()
+        analyzer.dns_client = _SlowMXClient516()
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'emails.txt')
+            with open(source, 'w') as f:
+                f.write(text)
+            writer = EmailStreamWriter516(tmp)
+            summary = analyzer.stream_analyze(source, writer, chunksize=chunksize)
+            return summary, list(read_stream(writer.path, 'email'))
+
+    def test_stream_chunks_without_valid_addresses(self):
+        """A chunk of only invalid lines streams rows with no MX records"""
+        summary, rows = self._stream('bad\nstill bad\nok@gmail.com\n', chunksize=1)
+
+        self.assertEqual((summary['total_emails'], summary['valid_emails']), (3, 1))
+        self.assertEqual([row['mx_count'] for row in rows], [0, 0, 1])
+        self.assertTrue(all(row['tool'] == '516 Hackers Email Analyzer' for row in rows))
+        self.assertIsNone(rows[0]['mx_records'])
+
+    def test_stream_empty_and_blank_input(self):
+        """Empty or whitespace-only files give an empty summary instead of failing"""
+        for text in ('', '   \n\t\n'):
+            summary, rows = self._stream(text, chunksize=2)
+            self.assertEqual((summary['total_emails'], rows), (0, []))
+
+class TestEmailPatternStats516(unittest.TestCase):
+
+    FIRSTS = ['john', 'mary', 'alex', 'sara', 'peter', 'linda']
+    LASTS = ['smith', 'jones', 'brown', 'taylor', 'wilson', 'walker']
+
+    def test_dominant_format_per_domain(self):
+        """Each domain's house format wins, with single-word forms resolved from known names"""
+        emails = []
+        for first in self.FIRSTS:
+            for last in self.LASTS:
+                emails += [f"{first}.{last}@acme.com", f"{first[0]}{last}@globex.com", f"{first}{last}@initech.com"]
+        emails += ['info@acme.com', 'support@globex.com', 'mary.jones+news@acme.com', 'not-an-email']
+
+        stats = EmailPatternStats516()
+        # Two batches: aggregation must carry across chunks
+        stats.add(pd.Series(emails[:50]))
+        stats.add(pd.Series(emails[50:]))
+        table = stats.summary().set_index('domain')
+
+        self.assertEqual(table.loc['acme.com', 'dominant_format'], '{first}.{last}')
+        self.assertEqual(table.loc['acme.com', 'addresses'], 38)
+        self.assertEqual(table.loc['acme.com', 'role_accounts'], 1)
+        self.assertEqual(table.loc['globex.com', 'dominant_format'], '{f}{last}')
+        self.assertEqual(table.loc['initech.com', 'dominant_format'], '{first}{last}')
+        self.assertGreater(table.loc['acme.com', 'confidence'], 0.9)
+
+    def test_small_samples_get_low_confidence(self):
+        """Two matching addresses are weaker evidence than thirty-six"""
+        stats = EmailPatternStats516()
+        stats.add(pd.Series(['john.smith@tiny.example', 'mary.jones@tiny.example']))
+        table = stats.summary().set_index('domain')
+
+        self.assertEqual(table.loc['tiny.example', 'dominant_share'], 1.0)
+        self.assertLess(table.loc['tiny.example', 'confidence'], 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
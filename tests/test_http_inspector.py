@@ -0,0 +1,92 @@
+"""
+516 Hackers - Tests for the HTTP Header Inspector
+"""
+
+import unittest
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from utils.http_inspector import HeaderInspector516
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    """'/' redirects to '/home', which refuses HEAD and serves a large page"""
+    protocol_version = 'HTTP/1.1'
+    body = b'x' * 200000
+
+    def do_HEAD(self):
+        if self.path == '/':
+            self._redirect()
+        else:
+            self._reply(405, b'', send_body=False)
+
+    def do_GET(self):
+        if self.path == '/':
+            self._redirect()
+        else:
+            self._reply(200, self.body, headers={'X-Frame-Options': 'DENY'})
+
+    def _redirect(self):
+        self._reply(301, b'', headers={'Location': '/home'})
+
+    def _reply(self, status, body, send_body=True, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body and body:
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    def log_message(self, format, *args):
+        pass
+
+class TestHeaderInspector516(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _SiteHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.domain = f"127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_redirect_chain_without_body(self):
+        """Hops are timed, HEAD falls back to GET, and the page body is not downloaded"""
+        inspector = HeaderInspector516(timeout=5)
+        result = inspector.inspect(self.domain)
+        inspector.close()
+
+        self.assertIn('https', result['schemes_failed'])
+        self.assertEqual([hop['status_code'] for hop in result['redirect_chain']], [301, 200])
+        self.assertEqual([hop['method'] for hop in result['redirect_chain']], ['HEAD', 'GET'])
+        self.assertTrue(result['final_url'].endswith('/home'))
+        self.assertEqual(result['security_headers']['X-Frame-Options'], 'DENY')
+        self.assertLess(result['bytes_transferred'], 20000)
+
+    def test_redirect_limit_is_an_error(self):
+        """A chain still redirecting at max_redirects is reported, not returned as a normal result"""
+        inspector = HeaderInspector516(max_redirects=0)
+        result = inspector.follow(f"http://{self.domain}/")
+        inspector.close()
+
+        self.assertTrue(result['redirect_limit_reached'])
+        self.assertIn('error', result)
+        self.assertEqual(result['status_code'], 301)
+
+    def test_no_scheme_answers(self):
+        """Unreachable hosts report an error for both schemes"""
+        inspector = HeaderInspector516(timeout=2)
+        result = inspector.inspect('127.0.0.1:9')
+        inspector.close()
+
+        self.assertIn('https:', result['error'])
+        self.assertIn('http:', result['error'])
+
+if __name__ == '__main__':
+    unittest.main()
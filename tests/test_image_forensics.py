@@ -0,0 +1,296 @@
+"""
+516 Hackers - Tests for Image Forensics
+"""
+
+import unittest
+import os
+import random
+import tempfile
+import imagehash
+from PIL import Image, ImageDraw
+from scripts.image_forensics import ImageForensics516
+from utils.hamming_index import HammingIndex516, choose_bands, flip_masks
+from utils.hash_matrix import HashMatrix516, pack_hashes
+from utils.image_hashing import HASH_FUNCTIONS, hash_file
+from utils.image_index import ImageIndex516
+
+def popcount(value):
+    return bin(value).count('1')
+
+def _draw_scene(path, seed, shift=0):
+    """Deterministic blocky image; a small shift keeps its perceptual hash close"""
+    rng = random.Random(seed)
+    img = Image.new('RGB', (128, 128), 'white')
+    draw = ImageDraw.Draw(img)
+    for _ in range(6):
+        x, y = rng.randrange(0, 96), rng.randrange(0, 96)
+        draw.rectangle([x + shift, y, x + shift + 32, y + 32], fill=(rng.randrange(256), 0, 0))
+    img.save(path)
+
+class TestHammingIndex516(unittest.TestCase):
+
+    def _clustered(self, count, seed=7):
+        rng = random.Random(seed)
+        centres = [rng.getrandbits(64) for _ in range(40)]
+        hashes = []
+        for i in range(count):
+            value = rng.choice(centres)
+            for _ in range(rng.randrange(0, 9)):
+                value ^= 1 << rng.randrange(64)
+            hashes.append((i, value))
+        return hashes
+
+    def _brute_force(self, hashes, radius):
+        return {
+            (a, b): popcount(ha ^ hb)
+            for b, hb in hashes for a, ha in hashes[:b] if popcount(ha ^ hb) <= radius
+        }
+
+    def test_pairs_match_brute_force(self):
+        """Every pair within the radius is found once, earlier entry first, and nothing else"""
+        hashes = self._clustered(600)
+        for radius in (0, 4, 10, 40):
+            found = list(HammingIndex516(radius=radius, expected_size=600).pairs(hashes))
+            self.assertEqual(len(found), len({(a, b) for a, b, _ in found}))
+            self.assertEqual({(a, b): d for a, b, d in found}, self._brute_force(hashes, radius))
+
+    def test_large_radius_falls_back_to_tiles(self):
+        """When bands cannot narrow the search the tiled scan is used"""
+        self.assertLess(HammingIndex516(radius=10).candidate_fraction, 1)
+        self.assertGreaterEqual(HammingIndex516(radius=40).candidate_fraction, 1)
+
+    def test_radius_when_fewer_bands_are_built(self):
+        """The per-band radius comes from the bands built, so pairs spread evenly over the bands are found"""
+        for radius in range(0, 17):
+            for expected_size in (10, 1000, 100000):
+                index = HammingIndex516(radius=radius, expected_size=expected_size)
+                self.assertEqual(index.sub_radius, radius // len(index.bands))
+
+                # `radius` bits spread round-robin over the bands: the least-hit band has exactly sub_radius
+                spread = 0
+                for n in range(radius):
+                    shift, mask, _ = index.bands[n % len(index.bands)]
+                    spread |= 1 << (shift + (n // len(index.bands)) % (mask.bit_length()))
+                self.assertEqual(list(index.pairs([('a', 0), ('b', spread)])), [('a', 'b', radius)])
+
+    def test_band_choice_never_wastes_bands(self):
+        """choose_bands only returns counts that rounding the width up actually builds"""
+        for radius in range(0, 33):
+            for expected_size in (10, 100000):
+                bands = choose_bands(64, radius, expected_size)
+                self.assertEqual(len(range(0, 64, -(-64 // bands))), bands)
+
+class TestFlipMasks(unittest.TestCase):
+
+    def test_every_mask_within_radius(self):
+        """flip_masks lists each width-bit mask with at most radius bits set, once"""
+        masks = flip_masks(10, 3)
+        self.assertEqual(len(set(masks)), len(masks))
+        self.assertEqual(sorted(masks), [m for m in range(1 << 10) if popcount(m) <= 3])
+
+class TestHashMatrix516(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        centres = [rng.getrandbits(64) for _ in range(30)]
+        self.hashes = []
+        for _ in range(700):
+            value = rng.choice(centres)
+            for _ in range(rng.randrange(0, 9)):
+                value ^= 1 << rng.randrange(64)
+            self.hashes.append(value)
+
+    def test_pairs_match_brute_force(self):
+        """Tiles that do not divide the input evenly still cover each pair once"""
+        matrix = HashMatrix516(self.hashes, tile_size=96)
+        for threshold in (0, 6):
+            found = {
+                (i, j): d
+                for rows, cols, distances in matrix.pairs(threshold)
+                for i, j, d in zip(rows.tolist(), cols.tolist(), distances.tolist())
+            }
+            expected = {
+                (i, j): popcount(self.hashes[i] ^ self.hashes[j])
+                for j in range(len(self.hashes)) for i in range(j)
+                if popcount(self.hashes[i] ^ self.hashes[j]) <= threshold
+            }
+            self.assertEqual(found, expected)
+
+    def test_one_vs_all(self):
+        """distances() agrees with a per-hash popcount"""
+        matrix = HashMatrix516(self.hashes)
+        self.assertEqual(matrix.distances(self.hashes[0]).tolist(),
+                         [popcount(self.hashes[0] ^ value) for value in self.hashes])
+
+    def test_pack_accepts_hex_and_imagehash(self):
+        """Hex strings and ImageHash objects pack to the same integer"""
+        image_hash = imagehash.hex_to_hash('f0e0c08000000001')
+        self.assertEqual(pack_hashes(['f0e0c08000000001', image_hash, 0xf0e0c08000000001]).tolist(),
+                         [0xf0e0c08000000001] * 3)
+
+class TestImageHashing(unittest.TestCase):
+
+    def test_small_image_matches_imagehash(self):
+        """Below the decode size every hash equals imagehash's own result"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'scene.png')
+            _draw_scene(path, 3)
+            hashes = hash_file(path)
+            with Image.open(path) as img:
+                expected = {name: func(img) for name, func in HASH_FUNCTIONS.items()}
+
+        self.assertEqual(hashes, expected)
+
+    def test_large_jpeg_stays_close(self):
+        """Draft decoding keeps each hash within a few bits of a full decode"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'large.jpg')
+            _draw_scene(path, 5)
+            Image.open(path).resize((2048, 2048)).save(path, quality=90)
+            hashes = hash_file(path)
+            with Image.open(path) as img:
+                expected = {name: func(img) for name, func in HASH_FUNCTIONS.items()}
+
+        for name in HASH_FUNCTIONS:
+            self.assertLessEqual(hashes[name] - expected[name], 4, name)
+
+    def test_only_requested_types(self):
+        """Callers get exactly the hashes they ask for"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'scene.png')
+            _draw_scene(path, 1)
+            self.assertEqual(set(hash_file(path, ('dhash', 'color_hash'))), {'dhash', 'color_hash'})
+            self.assertEqual(set(ImageForensics516(tmp).calculate_hashes(path, ('phash',))), {'phash'})
+            with self.assertRaises(ValueError):
+                hash_file(path, ('md5',))
+
+class TestImageForensics516(unittest.TestCase):
+
+    def test_compare_images(self):
+        """compare_images reports the same distance as imagehash subtraction"""
+        with tempfile.TemporaryDirectory() as tmp:
+            first, second = os.path.join(tmp, 'a.png'), os.path.join(tmp, 'b.png')
+            _draw_scene(first, 2)
+            _draw_scene(second, 2, shift=3)
+            result = ImageForensics516(tmp).compare_images(first, second)
+            expected = imagehash.average_hash(Image.open(first)) - imagehash.average_hash(Image.open(second))
+
+        self.assertEqual(result['hash_difference'], expected)
+        self.assertEqual(result['is_similar'], expected <= 10)
+
+    def test_find_similar_images(self):
+        """Near-duplicates pair up with the same scores as a direct comparison"""
+        with tempfile.TemporaryDirectory() as tmp:
+            for seed in range(4):
+                _draw_scene(os.path.join(tmp, f"scene{seed}.png"), seed)
+                _draw_scene(os.path.join(tmp, f"scene{seed}_copy.png"), seed, shift=1)
+
+            pairs = ImageForensics516(tmp).find_similar_images(tmp, threshold=6)
+
+            hashes = {name: imagehash.average_hash(Image.open(os.path.join(tmp, name)))
+                      for name in os.listdir(tmp) if name.endswith('.png')}
+            expected = {
+                frozenset((a, b)) for a in hashes for b in hashes
+                if a < b and hashes[a] - hashes[b] <= 6
+            }
+
+        self.assertEqual({frozenset((p['image1'], p['image2'])) for p in pairs}, expected)
+        self.assertTrue(all(frozenset((f"scene{s}.png", f"scene{s}_copy.png")) in expected for s in range(4)))
+        for pair in pairs:
+            self.assertEqual(pair['similarity_score'], 100 - (pair['hash_difference'] / 64) * 100)
+
+class TestImageIndex516(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.images = os.path.join(self.tmp.name, 'images')
+        os.makedirs(self.images)
+        for seed in range(3):
+            _draw_scene(os.path.join(self.images, f"scene{seed}.png"), seed)
+            _draw_scene(os.path.join(self.images, f"scene{seed}_copy.png"), seed, shift=1)
+        self.forensics = ImageForensics516(self.tmp.name)
+        self.index = ImageIndex516(os.path.join(self.tmp.name, 'index.sqlite'))
+        self.hashed = []
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def _hasher(self, path):
+        self.hashed.append(os.path.basename(path))
+        return self.forensics.calculate_hashes(path)
+
+    def test_incremental_update(self):
+        """Only new or changed files are hashed again; deleted files are dropped"""
+        stats = self.index.update_directory(self.images, self._hasher, workers=1)
+        self.assertEqual((stats['scanned'], stats['hashed']), (6, 6))
+
+        self.hashed.clear()
+        stats = self.index.update_directory(self.images, self._hasher, workers=1)
+        self.assertEqual((stats['unchanged'], stats['hashed']), (6, 0))
+
+        touched = os.path.join(self.images, 'scene0.png')
+        os.utime(touched, ns=(1, 1))
+        _draw_scene(os.path.join(self.images, 'scene9.png'), 9)
+        os.remove(os.path.join(self.images, 'scene1_copy.png'))
+        stats = self.index.update_directory(self.images, self._hasher, workers=1)
+
+        self.assertEqual(self.hashed, ['scene9.png'])
+        self.assertEqual((stats['touched'], stats['removed']), (1, 1))
+        self.assertEqual(len(self.index), 6)
+
+    def test_interrupted_update_keeps_stored_rows(self):
+        """Rows stored before an interruption are committed, not rolled back"""
+        def interrupting_hasher(path):
+            if len(self.hashed) == 2:
+                raise KeyboardInterrupt
+            return self._hasher(path)
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.index.update_directory(self.images, interrupting_hasher, workers=1)
+        reopened = ImageIndex516(self.index.path)
+        self.addCleanup(reopened.close)
+
+        self.assertEqual(len(reopened), 2)
+
+    def test_wildcard_characters_in_directory_names(self):
+        """Updating img_1 leaves rows for a sibling like imgX1 alone"""
+        for name in ('img_1', 'imgX1'):
+            os.makedirs(os.path.join(self.tmp.name, name))
+            _draw_scene(os.path.join(self.tmp.name, name, 'scene.png'), 4)
+        self.index.update_directory(os.path.join(self.tmp.name, 'imgX1'), self._hasher, workers=1)
+
+        stats = self.index.update_directory(os.path.join(self.tmp.name, 'img_1'), self._hasher,
+                                            recursive=True, workers=1)
+
+        self.assertEqual(stats['removed'], 0)
+        self.assertEqual(len(self.index.entries(directory=os.path.join(self.tmp.name, 'imgX1'))), 1)
+        self.assertEqual(len(self.index.entries(directory=os.path.join(self.tmp.name, 'img_1'))), 1)
+
+    def test_query_matches_brute_force(self):
+        """Band lookups return exactly the images within the threshold"""
+        self.index.update_directory(self.images, self._hasher, workers=1)
+        probe = os.path.join(self.tmp.name, 'probe.png')
+        _draw_scene(probe, 0, shift=2)
+
+        for threshold in (0, 5, 12):
+            result = self.forensics.query_index(self.index, probe, threshold)
+            target = imagehash.hex_to_hash(result['hash'])
+            expected = sorted(
+                (target - imagehash.average_hash(Image.open(os.path.join(self.images, name))), name)
+                for name in os.listdir(self.images)
+            )
+            expected = [(d, os.path.join(self.images, name)) for d, name in expected if d <= threshold]
+            self.assertEqual([(m['hash_difference'], m['path']) for m in result['matches']], expected)
+
+    def test_find_similar_images_from_index(self):
+        """Indexed and fresh runs report the same pairs"""
+        fresh = self.forensics.find_similar_images(self.images, threshold=6)
+        indexed = self.forensics.find_similar_images(self.images, threshold=6, index=self.index)
+        self.assertEqual(
+            {frozenset((p['image1'], p['image2'])) for p in indexed},
+            {frozenset((p['image1'], p['image2'])) for p in fresh}
+        )
+
+if __name__ == '__main__':
+    unittest.main()
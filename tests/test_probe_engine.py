@@ -0,0 +1,314 @@
+"""
+516 Hackers - Tests for the Async Probe Engine
+"""
+
+import unittest
+import os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from utils.probe_engine import ProbeEngine516, SharedProbeService516
+from utils.platform_rules import compile_platform_rules
+from utils.scheduler import HostScheduler516, TokenBucket516
+from utils.probe_cache import ProbeCache516
+from utils.adaptive_concurrency import AdaptiveWindow516
+from utils.platform_simulator import PlatformSimulator516
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """Stand-in platform: /found/* exists, /big/* exists behind a large page,
+    /gone/* shows an error page, /moved/* redirects away, /busy/* answers
+    429 once, /nohead/* refuses HEAD and everything else is a 404"""
+
+    hits = 0
+    busy_seen = set()
+
+    def do_HEAD(self):
+        self.do_GET(send_body=False)
+
+    def do_GET(self, send_body=True):
+        type(self).hits += 1
+        time.sleep(0.3)
+        body = b''
+        if self.path.startswith('/found/'):
+            self.send_response(200)
+        elif self.path.startswith('/big/'):
+            self.send_response(200)
+            body = b'x' * 300000
+        elif self.path.startswith('/nohead/'):
+            self.send_response(200 if send_body else 405)
+        elif self.path.startswith('/busy/'):
+            # Throttle the first request for each path, then let it through
+            if self.path in self.busy_seen:
+                self.send_response(200)
+            else:
+                self.busy_seen.add(self.path)
+                self.send_response(429)
+        elif self.path.startswith('/gone/'):
+            self.send_response(200)
+            body = b'<html>' + b' ' * 20000 + b'Page not found</html>'
+        elif self.path.startswith('/moved/'):
+            self.send_response(302)
+            self.send_header('Location', '/login')
+        else:
+            self.send_response(404)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server = None
+
+def setUpModule():
+    global _server
+    _server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+
+def tearDownModule():
+    _server.shutdown()
+    _server.server_close()
+
+class TestProbeEngine516(unittest.TestCase):
+
+    def setUp(self):
+        self.base_url = f"http://127.0.0.1:{_server.server_address[1]}"
+
+    def test_probes_run_concurrently(self):
+        """Wall-clock time is bounded by the slowest probe, not the sum"""
+        engine = ProbeEngine516(max_workers=5, timeout=5)
+        rules = compile_platform_rules({f'site{i}': {'url': self.base_url + f'/found/{i}/' + '{}'} for i in range(5)})
+
+        started = time.monotonic()
+        outcomes = engine.probe_rules(rules, 'alice')
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(list(outcomes), list(rules))
+        self.assertTrue(all(o['status_code'] == 200 for o in outcomes.values()))
+        self.assertLess(elapsed, 1.2)
+
+    def test_errors_are_reported_per_target(self):
+        """A failing platform does not abort the others"""
+        engine = ProbeEngine516(max_workers=2, timeout=5)
+        outcomes = engine.probe_rules(compile_platform_rules({
+            'missing': {'url': self.base_url + '/missing/{}'},
+            'broken': {'url': 'http://127.0.0.1:1/{}'}
+        }), 'alice')
+
+        self.assertEqual(outcomes['missing']['status_code'], 404)
+        self.assertIn('error', outcomes['broken'])
+
+    def test_platform_rules(self):
+        """Each check type decides existence from what it fetched"""
+        rules = compile_platform_rules({
+            'status': {'url': self.base_url + '/found/{}'},
+            'missing': {'url': self.base_url + '/nobody/{}'},
+            'marker': {'url': self.base_url + '/gone/{}', 'check_type': 'body_marker',
+                       'not_found_marker': 'Page not found'},
+            'redirect': {'url': self.base_url + '/moved/{}', 'check_type': 'redirect'},
+            'teapot': {'url': self.base_url + '/nobody/{}', 'accepted_codes': [404]}
+        })
+        outcomes = ProbeEngine516(max_workers=5, timeout=5).probe_rules(rules, 'alice')
+
+        self.assertTrue(outcomes['status']['exists'])
+        self.assertEqual(outcomes['status']['url'], self.base_url + '/found/alice')
+        self.assertFalse(outcomes['missing']['exists'])
+        self.assertFalse(outcomes['marker']['exists'])
+        self.assertFalse(outcomes['redirect']['exists'])
+        self.assertEqual(outcomes['redirect']['status_code'], 302)
+        self.assertTrue(outcomes['teapot']['exists'])
+
+    def test_minimal_transfer_modes(self):
+        """Status checks skip the body, body checks stop at the byte cap"""
+        rules = compile_platform_rules({
+            'streamed': {'url': self.base_url + '/big/{}'},
+            'head': {'url': self.base_url + '/big/{}', 'supports_head': True},
+            'nohead': {'url': self.base_url + '/nohead/{}', 'supports_head': True},
+            'capped': {'url': self.base_url + '/gone/{}', 'check_type': 'body_marker',
+                       'not_found_marker': 'Page not found', 'max_bytes': 1024}
+        })
+        engine = ProbeEngine516(max_workers=4, timeout=5)
+        outcomes = engine.probe_rules(rules, 'dave')
+
+        self.assertTrue(outcomes['streamed']['exists'])
+        self.assertEqual(outcomes['streamed']['method'], 'GET')
+        self.assertLess(outcomes['streamed']['bytes_transferred'], 65536)
+        self.assertEqual(outcomes['head']['method'], 'HEAD')
+        self.assertLess(outcomes['head']['bytes_transferred'], 500)
+        # HEAD refused: fall back to GET now and skip HEAD from then on
+        self.assertTrue(outcomes['nohead']['exists'])
+        self.assertEqual(outcomes['nohead']['method'], 'GET')
+        self.assertIn('nohead', engine.head_unsupported)
+        # The marker sits past the cap, so the capped read never sees it
+        self.assertTrue(outcomes['capped']['exists'])
+        self.assertLess(outcomes['capped']['bytes_transferred'], 4096)
+
+    def test_invalid_rule_rejected(self):
+        """Unknown check types fail at compile time, not mid-scan"""
+        with self.assertRaises(ValueError):
+            compile_platform_rules({'bad': {'url': 'https://x/{}', 'check_type': 'ping'}})
+
+    def test_cache_answers_repeat_probes(self):
+        """Fresh outcomes come from the cache; expired or refreshed ones refetch"""
+        rules = compile_platform_rules({
+            'found': {'url': self.base_url + '/found/{}'},
+            'missing': {'url': self.base_url + '/nobody/{}'}
+        })
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'cache.sqlite')
+            cache = ProbeCache516(path, positive_ttl=3600, negative_ttl=0)
+            engine = ProbeEngine516(max_workers=2, timeout=5, cache=cache)
+            engine.probe_rules(rules, 'Alice')
+
+            hits_before = _SlowHandler.hits
+            outcomes = engine.probe_rules(rules, ' alice ')
+            self.assertTrue(outcomes['found'].get('cached'))
+            self.assertTrue(outcomes['found']['exists'])
+            # The negative TTL of zero forces the miss to be re-probed
+            self.assertNotIn('cached', outcomes['missing'])
+            self.assertEqual(_SlowHandler.hits - hits_before, 1)
+            engine.close()
+
+            refreshed = ProbeCache516(path, refresh=True)
+            self.assertIsNone(refreshed.get('found', 'alice'))
+            refreshed.close()
+
+    def test_shared_service_deduplicates_probes(self):
+        """Identical probes are fetched once across tools, each tool gets its own copy"""
+        url = self.base_url + '/found/{}'
+        mapper_rules = compile_platform_rules({'github': {'url': url}, 'gh_mirror': {'url': url}})
+        sherlock_rules = compile_platform_rules({'github': {'url': url}})
+        service = SharedProbeService516(max_workers=4, timeout=5)
+
+        hits_before = _SlowHandler.hits
+        first = service.probe_rules(mapper_rules, 'erin')
+        second = service.probe_rules(sherlock_rules, 'erin')
+
+        self.assertEqual(_SlowHandler.hits - hits_before, 1)
+        self.assertEqual(service.stats, {'probes': 1, 'deduplicated': 2})
+        self.assertTrue(second['github']['deduplicated'])
+        self.assertTrue(second['github']['exists'])
+        second['github']['exists'] = False
+        self.assertTrue(first['github']['exists'])
+
+class TestHostScheduler516(unittest.TestCase):
+
+    def setUp(self):
+        port = _server.server_address[1]
+        # Two host names for the same server give two independent buckets
+        self.rules = compile_platform_rules({
+            'slow_host': {'url': f"http://127.0.0.1:{port}/found/{{}}", 'rate_limit': 4},
+            'fast_host': {'url': f"http://localhost:{port}/found/{{}}", 'rate_limit': 100}
+        })
+
+    def test_token_bucket_paces_after_burst(self):
+        """Tokens beyond the burst are spaced at 1/rate seconds"""
+        bucket = TokenBucket516(rate=10, capacity=2)
+        waits = [bucket.reserve() for _ in range(4)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1, delta=0.02)
+        self.assertAlmostEqual(waits[3], 0.2, delta=0.02)
+
+    def test_bulk_jobs_are_paced_per_host(self):
+        """Each host keeps its own rate while every job still completes"""
+        engine = ProbeEngine516(max_workers=10, timeout=5)
+        scheduler = HostScheduler516(engine, burst=1)
+        usernames = [f"user{i}" for i in range(5)]
+        finished = {}
+
+        def on_result(username, platform, outcome):
+            finished.setdefault(platform, []).append(time.monotonic())
+
+        started = time.monotonic()
+        results = scheduler.run(
+            ((username, rule) for username in usernames for rule in self.rules.values()),
+            on_result=on_result
+        )
+
+        self.assertEqual(sorted(results), usernames)
+        self.assertTrue(all(len(platforms) == 2 for platforms in results.values()))
+        # 5 probes at 4/s on the slow host need at least a second of pacing
+        self.assertGreater(max(finished['slow_host']) - started, 1.0)
+        self.assertLess(max(finished['fast_host']), max(finished['slow_host']) - 0.2)
+
+    def test_jobs_are_read_lazily(self):
+        """Probing starts before the job list is exhausted and each host only reads ahead a little"""
+        engine = ProbeEngine516(max_workers=2, timeout=5)
+        rule = self.rules['slow_host']
+        pulled = []
+        pulled_at_first_result = []
+
+        def jobs():
+            for i in range(20):
+                pulled.append(i)
+                yield f"user{i}", rule
+
+        def on_result(username, platform, outcome):
+            if not pulled_at_first_result:
+                pulled_at_first_result.append(len(pulled))
+
+        HostScheduler516(engine, rate=50, burst=1, lookahead=2).run(jobs(), on_result=on_result, collect=False)
+
+        self.assertEqual(len(pulled), 20)
+        self.assertLess(pulled_at_first_result[0], 10)
+
+    def test_bulk_scan_rides_out_429_bursts(self):
+        """Simulated 429 bursts are retried until every probe has an answer"""
+        routes = {
+            'alpha': {'latency': 0.01, 'body_size': 1000, 'burst_every': 5, 'burst_length': 2},
+            'beta': {'latency': 0.01, 'body_size': 1000}
+        }
+        with PlatformSimulator516(routes) as simulator:
+            rules = simulator.rules_for({
+                'alpha': {'url': 'https://alpha.example/u/{}'},
+                'beta': {'url': 'https://beta.example/{}'}
+            })
+            engine = ProbeEngine516(max_workers=4, timeout=5)
+            for window in (engine.window_for(rule) for rule in rules.values()):
+                window.backoff_base = 0.01
+            results = HostScheduler516(engine, rate=500, burst=50).run(
+                (f"user{i}", rule) for i in range(10) for rule in rules.values()
+            )
+            stats = simulator.stats()
+
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(o['exists'] for r in results.values() for o in r.values()))
+        self.assertGreater(stats['alpha']['throttled'], 0)
+        self.assertEqual(stats['alpha']['requests'], 10 + stats['alpha']['throttled'])
+
+class TestAdaptiveWindow516(unittest.TestCase):
+
+    def test_aimd_window(self):
+        """Healthy replies grow the window; throttling halves it once per round trip"""
+        window = AdaptiveWindow516(initial=2, maximum=8)
+        for _ in range(20):
+            window.record({'response_time': 0.1})
+        grown = window.window
+        self.assertGreater(grown, 4)
+
+        window.record({'throttled': True, 'error': 'Throttled (HTTP 429)'})
+        window.record({'throttled': True, 'error': 'Throttled (HTTP 429)'})
+        self.assertAlmostEqual(window.window, grown / 2)
+
+        window._decreased_at = 0.0
+        window.record({'response_time': 5.0})
+        self.assertAlmostEqual(window.window, grown / 4)
+
+    def test_throttled_probe_is_retried(self):
+        """A 429 is retried after backoff and reported once it clears"""
+        port = _server.server_address[1]
+        rules = compile_platform_rules({
+            'busy': {'url': f"http://127.0.0.1:{port}/busy/{{}}"}
+        })
+        engine = ProbeEngine516(max_workers=2, timeout=5)
+        engine.window_for(rules['busy']).backoff_base = 0.05
+
+        outcome = engine.probe_rules(rules, 'carol')['busy']
+
+        self.assertTrue(outcome['exists'])
+        self.assertEqual(outcome['attempts'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
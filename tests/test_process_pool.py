@@ -0,0 +1,47 @@
+"""
+516 Hackers - Tests for the Process Pool
+"""
+
+import unittest
+import os
+import tempfile
+from PIL import Image
+from utils.process_pool import map_files
+from scripts.metadata_analyzer import MetadataAnalyzer516
+
+def _square(value):
+    if value == 13:
+        raise ValueError('unlucky')
+    return value * value
+
+class TestMapFiles(unittest.TestCase):
+
+    def test_ordered_results_across_processes(self):
+        """Ordered mode yields every item in input order, errors included"""
+        results = list(map_files(_square, range(40), workers=3, chunksize=4, ordered=True))
+
+        self.assertEqual([item for item, _, _ in results], list(range(40)))
+        self.assertEqual(results[5][1], 25)
+        self.assertIsInstance(results[13][2], ValueError)
+
+    def test_unordered_results_cover_every_item(self):
+        """Unordered mode yields each item exactly once"""
+        results = list(map_files(_square, range(40), workers=3, chunksize=4))
+
+        self.assertEqual(sorted(item for item, _, _ in results), list(range(40)))
+        self.assertEqual(
+            {item: result for item, result, error in results if error is None},
+            {item: item * item for item in range(40) if item != 13}
+        )
+
+    def test_analyze_multiple_in_parallel(self):
+        """The metadata scan gives the same results on a pool as in-process"""
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(5):
+                Image.new('RGB', (8 + i, 8), 'red').save(os.path.join(tmp, f"img{i}.png"))
+            analyzer = MetadataAnalyzer516(tmp)
+
+            self.assertEqual(analyzer.analyze_multiple(tmp, workers=2), analyzer.analyze_multiple(tmp, workers=1))
+
+if __name__ == '__main__':
+    unittest.main()
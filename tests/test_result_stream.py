@@ -0,0 +1,65 @@
+"""
+516 Hackers - Tests for the Streaming Result Sink
+"""
+
+import unittest
+import json
+import os
+import tempfile
+from utils.result_stream import NDJSONSink516, read_stream, group_probes
+from scripts.sherlock_wrapper import Sherlock516
+
+class TestResultStream516(unittest.TestCase):
+
+    def test_records_are_flushed_as_written(self):
+        """Each probe is on disk as one compact line before the sink closes"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sink = NDJSONSink516.create(temp_dir, 'probes', tool='test')
+            sink.write_probe('alice', 'github', {'url': 'https://github.com/alice', 'exists': True})
+
+            with open(sink.path) as f:
+                lines = f.readlines()
+            self.assertEqual(len(lines), 1)
+            self.assertNotIn(': ', lines[0])
+            self.assertEqual(json.loads(lines[0])['tool'], 'test')
+
+            sink.close({'usernames': 1})
+            summary = list(read_stream(sink.path, 'summary'))
+            self.assertEqual(summary[0]['usernames'], 1)
+
+    def test_reports_rebuild_from_interrupted_stream(self):
+        """A torn final line is skipped and the rest still rebuilds"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'scan.ndjson')
+            with NDJSONSink516(path) as sink:
+                sink.write_probe('alice', 'github', {'url': 'https://github.com/alice', 'exists': True})
+                sink.write_probe('alice', 'reddit', {'url': 'https://reddit.com/user/alice', 'exists': False})
+                sink.write_probe('bob', 'github', {'url': 'https://github.com/bob', 'exists': False,
+                                                   'error': 'Timed out'})
+            with open(path, 'a') as f:
+                f.write('{"type":"probe","username":"bob","plat')
+
+            grouped = group_probes(path)
+            self.assertEqual(list(grouped), ['alice', 'bob'])
+
+            alice, bob = Sherlock516.from_stream(path, temp_dir)
+            self.assertEqual(alice.found_profiles, ['github'])
+            self.assertEqual(alice.results['reddit']['status'], 'Not found')
+            self.assertEqual(bob.results['github']['status'], 'Error: Timed out')
+            self.assertIn('Found on: github', alice.generate_report())
+
+    def test_resume_after_torn_line(self):
+        """Reopening a stream drops a torn last line instead of gluing the next record onto it"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'bulk.ndjson')
+            with open(path, 'w') as f:
+                f.write('{"type":"domain","domain":"a.com"}\n{"type":"domain","domain":"b.c')
+
+            sink = NDJSONSink516(path)
+            sink.write({'type': 'domain', 'domain': 'c.com'})
+            sink.close()
+
+            self.assertEqual([r['domain'] for r in read_stream(path, 'domain')], ['a.com', 'c.com'])
+
+if __name__ == '__main__':
+    unittest.main()
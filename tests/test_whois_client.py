@@ -0,0 +1,101 @@
+"""
+516 Hackers - Tests for the WHOIS Client
+"""
+
+import unittest
+import os
+import tempfile
+import time
+from whois import WhoisError
+from utils.whois_client import WhoisCache516, WhoisClient516, WhoisRecord516
+
+RAW_RESPONSE = """Domain Name: EXAMPLE.COM
+Registry Domain ID: 2336799_DOMAIN_COM-VRSN
+Registrar: RESERVED-Internet Assigned Numbers Authority
+Creation Date: 1995-08-14T04:00:00Z
+Registry Expiry Date: 2026-08-13T04:00:00Z
+Name Server: A.IANA-SERVERS.NET
+"""
+
+class _OfflineWhoisClient516(WhoisClient516):
+    """Serves a fixed response per lookup, still paced by the server bucket"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.fetches = []
+
+    def _server_for(self, domain):
+        return 'whois.example-registry.net'
+
+    def _query(self, server, domain, timeout):
+        self.fetches.append((domain, time.monotonic()))
+        return RAW_RESPONSE
+
+class TestWhoisClient516(unittest.TestCase):
+
+    def test_raw_text_is_cached_across_clients(self):
+        """A second client reads the stored text instead of querying again"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'whois.sqlite')
+            first = _OfflineWhoisClient516(cache=WhoisCache516(path))
+            first.lookup('example.com')
+
+            second = _OfflineWhoisClient516(cache=WhoisCache516(path))
+            record = second.lookup('https://EXAMPLE.com/page')
+            first.cache.close()
+            second.cache.close()
+
+        self.assertEqual(second.fetches, [])
+        self.assertTrue(record.cached)
+        self.assertEqual(record.parsed['registrar'], 'RESERVED-Internet Assigned Numbers Authority')
+
+    def test_expired_entries_are_refetched(self):
+        """Entries older than the TTL go back to the registry"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = WhoisCache516(os.path.join(tmp, 'whois.sqlite'), ttl=3600)
+            cache.put(WhoisRecord516('example.com', RAW_RESPONSE, fetched_at=time.time() - 7200))
+            client = _OfflineWhoisClient516(cache=cache)
+            client.lookup('example.com')
+            cache.close()
+
+        self.assertEqual(len(client.fetches), 1)
+
+    def test_not_found_answers_expire_sooner(self):
+        """A "No match" answer older than the negative TTL is fetched again"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = WhoisCache516(os.path.join(tmp, 'whois.sqlite'), ttl=604800, negative_ttl=3600)
+            fetched_at = time.time() - 7200
+            cache.put(WhoisRecord516('newly-registered.com', 'No match for "NEWLY-REGISTERED.COM".\n', fetched_at=fetched_at))
+            cache.put(WhoisRecord516('example.com', RAW_RESPONSE, fetched_at=fetched_at))
+            client = _OfflineWhoisClient516(cache=cache)
+            client.lookup('newly-registered.com')
+            client.lookup('example.com')
+            cache.close()
+
+        self.assertEqual([domain for domain, _ in client.fetches], ['newly-registered.com'])
+
+    def test_server_bucket_paces_lookups(self):
+        """Lookups beyond the burst wait for the server's bucket to refill"""
+        client = _OfflineWhoisClient516(rate=10.0, burst=2)
+
+        for i in range(4):
+            client.lookup(f"site{i}.com")
+
+        times = [at for _, at in client.fetches]
+        self.assertGreaterEqual(times[-1] - times[0], 0.15)
+
+    def test_rate_limit_wait_respects_the_deadline(self):
+        """A lookup that would wait past its deadline fails at once and queries nothing"""
+        client = _OfflineWhoisClient516(rate=0.1, burst=1)
+        client.lookup('site0.com')
+
+        started = time.monotonic()
+        with self.assertRaises(WhoisError):
+            client.lookup('site1.com', deadline=started + 0.5)
+
+        self.assertLess(time.monotonic() - started, 0.2)
+        self.assertEqual([domain for domain, _ in client.fetches], ['site0.com'])
+        self.assertEqual(client.stats['rate_limited'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
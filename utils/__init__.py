@@ -13,12 +13,14 @@ from .helpers import (
     calculate_file_hash,
     format_timestamp,
     validate_email,
+    read_targets,
     print_banner
 )
 
 from .config_loader import ConfigLoader, config
 from .logger import Logger516, logger
 from .export_utils import ExportUtils516
+from .probe_engine import ProbeEngine516, SharedProbeService516
 
 __all__ = [
     'create_output_dir',
@@ -26,10 +28,13 @@ __all__ = [
     'calculate_file_hash',
     'format_timestamp',
     'validate_email',
+    'read_targets',
     'print_banner',
     'ConfigLoader',
     'config',
     'Logger516', 
     'logger',
-    'ExportUtils516'
+    'ExportUtils516',
+    'ProbeEngine516',
+    'SharedProbeService516'
 ]
@@ -0,0 +1,99 @@
+"""
+516 Digital Investigation Tools - Adaptive Concurrency
+AIMD concurrency windows that settle at the rate each platform tolerates
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+
+class AdaptiveWindow516:
+    """Additive-increase / multiplicative-decrease window for one platform
+
+    Healthy responses grow the window by roughly one slot per window's worth
+    of successes; throttling replies, timeouts or latency well above the
+    healthy baseline halve it, at most once per round trip.
+    """
+
+    def __init__(self, initial=2, minimum=1, maximum=16, latency_factor=2.0,
+                 backoff_base=1.0, backoff_max=60.0):
+        self.window = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_factor = latency_factor
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.baseline = None
+        self.in_flight = 0
+        self._decreased_at = 0.0
+        self._waiters = deque()
+
+    @property
+    def limit(self):
+        """Number of probes currently allowed in flight"""
+        return max(self.minimum, int(self.window))
+
+    async def acquire(self):
+        """Wait for a free slot in the window"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self, outcome=None):
+        """Free a slot, feeding the probe outcome back into the window"""
+        if outcome is not None:
+            self.record(outcome)
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def record(self, outcome):
+        """Adjust the window from a single probe outcome"""
+        if outcome.get('throttled'):
+            self._decrease()
+            return
+        if 'error' in outcome or outcome.get('cached') or outcome.get('deduplicated'):
+            return
+
+        latency = outcome.get('response_time') or 0.0
+        if self.baseline is None:
+            self.baseline = latency
+        elif latency > self.baseline * self.latency_factor:
+            # Let the baseline drift so a platform that is simply slower
+            # does not pin the window at the minimum forever
+            self.baseline = 0.95 * self.baseline + 0.05 * latency
+            self._decrease()
+            return
+        else:
+            self.baseline = 0.8 * self.baseline + 0.2 * latency
+
+        self.window = min(self.maximum, self.window + 1.0 / self.window)
+
+    def _decrease(self):
+        """Halve the window, once per round trip"""
+        now = time.monotonic()
+        if now - self._decreased_at < (self.baseline or 1.0):
+            return
+        self._decreased_at = now
+        self.window = max(float(self.minimum), self.window / 2)
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before retrying a throttled probe"""
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after)
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
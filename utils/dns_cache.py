@@ -0,0 +1,165 @@
+"""
+516 Digital Investigation Tools - DNS Cache
+Process-wide TTL-honoring cache of DNS answers with an optional disk store
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from utils.config_loader import config
+
+# Statuses worth remembering; SERVFAIL, TIMEOUT and ERROR say nothing about the name
+CACHEABLE_STATUSES = ('NOERROR', 'NOANSWER', 'NXDOMAIN')
+
+class DNSCache516:
+    """LRU cache keyed by (name, record type) that expires entries by TTL
+
+    Positive answers live for their record TTL. Negative answers (NXDOMAIN,
+    NOANSWER) live for the SOA-derived negative TTL and are not cached at
+    all when the response carried no SOA, as RFC 2308 prescribes. An
+    NXDOMAIN is stored once per name and answers every record type.
+    """
+
+    def __init__(self, max_entries=10000, path=None, min_ttl=0, max_ttl=86400):
+        self.max_entries = max_entries
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.path = path
+        self.stats_counters = {'hits': 0, 'misses': 0, 'negative_hits': 0, 'expired': 0, 'evictions': 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS dns_answers (
+                    name TEXT NOT NULL,
+                    rdtype TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (name, rdtype)
+                )
+            """)
+            self._conn.commit()
+
+    @staticmethod
+    def _key(name, record_type):
+        return name.rstrip('.').lower(), record_type.upper()
+
+    def get(self, name, record_type):
+        """Return a fresh cached answer with its remaining TTL, otherwise None"""
+        name, record_type = self._key(name, record_type)
+        now = time.time()
+
+        with self._lock:
+            for key in ((name, record_type), (name, 'NXDOMAIN')):
+                entry = self._lookup(key, now)
+                if entry is None:
+                    continue
+                expires_at, answer = entry
+                self.stats_counters['hits'] += 1
+                if answer['status'] != 'NOERROR':
+                    self.stats_counters['negative_hits'] += 1
+                return dict(answer, ttl=int(expires_at - now), cached=True)
+
+            self.stats_counters['misses'] += 1
+            return None
+
+    def _lookup(self, key, now):
+        """Memory first, then the disk store; expired entries are dropped"""
+        entry = self._entries.get(key)
+        if entry is None and self._conn is not None:
+            row = self._conn.execute(
+                "SELECT answer, expires_at FROM dns_answers WHERE name = ? AND rdtype = ?", key
+            ).fetchone()
+            if row is not None:
+                entry = (row[1], json.loads(row[0]))
+                self._remember(key, entry)
+
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            self.stats_counters['expired'] += 1
+            self._entries.pop(key, None)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, name, record_type, answer):
+        """Store an answer for as long as its TTL allows"""
+        if answer.get('status') not in CACHEABLE_STATUSES or answer.get('ttl') is None:
+            return
+
+        ttl = min(max(answer['ttl'], self.min_ttl), self.max_ttl)
+        if ttl <= 0:
+            return
+
+        if answer['status'] == 'NXDOMAIN':
+            record_type = 'NXDOMAIN'
+        key = self._key(name, record_type)
+        stored = {k: v for k, v in answer.items() if k not in ('cached', 'short_circuited')}
+        entry = (time.time() + ttl, stored)
+
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO dns_answers (name, rdtype, answer, expires_at) VALUES (?, ?, ?, ?)",
+                    (key[0], key[1], json.dumps(stored), entry[0])
+                )
+                self._conn.commit()
+
+    def _remember(self, key, entry):
+        """Insert into the in-memory LRU, evicting the least recently used entry"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats_counters['evictions'] += 1
+
+    def stats(self):
+        """Hit/miss counters plus the current in-memory size"""
+        with self._lock:
+            lookups = self.stats_counters['hits'] + self.stats_counters['misses']
+            return dict(
+                self.stats_counters,
+                entries=len(self._entries),
+                hit_rate=round(self.stats_counters['hits'] / lookups, 3) if lookups else None
+            )
+
+    def clear(self):
+        """Drop every in-memory entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            for key in self.stats_counters:
+                self.stats_counters[key] = 0
+
+    def close(self):
+        """Close the disk store, if any"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def open_dns_cache():
+    """Build the DNS cache from the dns_cache config section, or None when disabled"""
+    settings = config.get('default', 'dns_cache', {})
+    if not settings.get('enabled', True):
+        return None
+
+    path = None
+    if settings.get('persist', False):
+        output_dir = config.get('default', 'settings.output_directory', 'outputs')
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, settings.get('filename', 'dns_cache.sqlite'))
+
+    return DNSCache516(
+        max_entries=settings.get('max_entries', 10000),
+        path=path,
+        min_ttl=settings.get('min_ttl', 0),
+        max_ttl=settings.get('max_ttl', 86400)
+    )
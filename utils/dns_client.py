@@ -0,0 +1,179 @@
+"""
+516 Digital Investigation Tools - DNS Client
+Concurrent multi-record DNS queries over one long-lived async resolver
+"""
+
+import asyncio
+import dns.asyncresolver
+import dns.exception
+import dns.rdatatype
+import dns.resolver
+import dns.reversename
+from typing import Dict, Any, Iterable
+from utils.config_loader import config
+from utils.dns_cache import open_dns_cache
+
+DEFAULT_RECORD_TYPES = ('A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME')
+
+def _rdata_to_dict(rdata):
+    """Structured form of a single DNS record"""
+    rdtype = rdata.rdtype
+    if rdtype == dns.rdatatype.MX:
+        return {'preference': rdata.preference, 'exchange': str(rdata.exchange)}
+    if rdtype == dns.rdatatype.SOA:
+        return {
+            'mname': str(rdata.mname),
+            'rname': str(rdata.rname),
+            'serial': rdata.serial,
+            'refresh': rdata.refresh,
+            'retry': rdata.retry,
+            'expire': rdata.expire,
+            'minimum': rdata.minimum
+        }
+    if rdtype == dns.rdatatype.SRV:
+        return {'priority': rdata.priority, 'weight': rdata.weight, 'port': rdata.port, 'target': str(rdata.target)}
+    if rdtype == dns.rdatatype.CAA:
+        return {'flags': rdata.flags, 'tag': rdata.tag.decode(), 'value': rdata.value.decode()}
+    if rdtype == dns.rdatatype.TXT:
+        return b''.join(rdata.strings).decode('utf-8', errors='replace')
+    return rdata.to_text()
+
+def negative_ttl(response):
+    """Negative-caching TTL from a response's SOA (RFC 2308): min(SOA TTL, SOA MINIMUM)"""
+    if response is None:
+        return None
+    for rrset in response.authority:
+        if rrset.rdtype == dns.rdatatype.SOA:
+            return min(rrset.ttl, rrset[0].minimum)
+    return None
+
+class DNSClient516:
+    """Issues every requested record type at once from a single resolver
+
+    Answers come back as {'status', 'ttl', 'records'} dicts. Status is one
+    of NOERROR, NOANSWER, NXDOMAIN, SERVFAIL, TIMEOUT or ERROR. With a
+    cache, fresh answers are served from it and flagged 'cached'.
+    """
+
+    def __init__(self, lifetime=None, cache=None):
+        self.resolver = dns.asyncresolver.Resolver()
+        self.resolver.lifetime = lifetime or config.get('default', 'settings.request_timeout', 10)
+        self.cache = cache
+
+    async def query_one_async(self, domain: str, record_type: str) -> Dict[str, Any]:
+        """Resolve a single record type, consulting the cache first"""
+        if self.cache is not None:
+            cached = self.cache.get(domain, record_type)
+            if cached is not None:
+                return cached
+
+        answer = await self._resolve(domain, record_type)
+        if self.cache is not None:
+            self.cache.put(domain, record_type, answer)
+        return answer
+
+    async def _resolve(self, domain, record_type):
+        """One query on the wire"""
+        try:
+            answer = await self.resolver.resolve(domain, record_type, raise_on_no_answer=False)
+        except dns.resolver.NXDOMAIN as e:
+            responses = list(e.responses().values())
+            return {'status': 'NXDOMAIN', 'ttl': negative_ttl(responses[0] if responses else None), 'records': []}
+        except dns.resolver.NoNameservers as e:
+            return {'status': 'SERVFAIL', 'ttl': None, 'records': [], 'error': str(e)}
+        except dns.exception.Timeout as e:
+            return {'status': 'TIMEOUT', 'ttl': None, 'records': [], 'error': str(e)}
+        except Exception as e:
+            return {'status': 'ERROR', 'ttl': None, 'records': [], 'error': str(e)}
+
+        if answer.rrset is None:
+            return {'status': 'NOANSWER', 'ttl': negative_ttl(answer.response), 'records': []}
+
+        return {
+            'status': 'NOERROR',
+            'ttl': answer.rrset.ttl,
+            'records': [_rdata_to_dict(rdata) for rdata in answer.rrset]
+        }
+
+    async def query_async(self, domain: str, record_types: Iterable[str] = DEFAULT_RECORD_TYPES) -> Dict[str, Any]:
+        """Resolve several record types concurrently
+
+        The first NXDOMAIN cancels the outstanding queries, since the name
+        cannot have records of any other type either.
+        """
+        record_types = list(dict.fromkeys(record_types))
+        tasks = {
+            asyncio.ensure_future(self.query_one_async(domain, record_type)): record_type
+            for record_type in record_types
+        }
+        results = {}
+        pending = set(tasks)
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[tasks[task]] = task.result()
+            nxdomain = next((r for r in results.values() if r['status'] == 'NXDOMAIN'), None)
+            if nxdomain is not None:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                for record_type in record_types:
+                    results.setdefault(record_type, dict(nxdomain, short_circuited=True))
+                break
+
+        return {record_type: results[record_type] for record_type in record_types}
+
+    async def reverse_async(self, addresses: Iterable[str], deadline: float = None) -> Dict[str, Any]:
+        """PTR lookups for many addresses at once, abandoning any still running at the deadline
+
+        PTR answers go through the cache like any other query, so an address
+        shared by many domains (CDNs, shared hosting) is resolved once per TTL.
+        """
+        addresses = list(dict.fromkeys(addresses))
+        tasks = {}
+        results = {}
+        for address in addresses:
+            try:
+                name = dns.reversename.from_address(address).to_text()
+            except Exception as e:
+                results[address] = {'status': 'ERROR', 'ttl': None, 'records': [], 'error': str(e)}
+                continue
+            tasks[asyncio.ensure_future(self.query_one_async(name, 'PTR'))] = address
+
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in done:
+                results[tasks[task]] = task.result()
+            for task in pending:
+                task.cancel()
+                results[tasks[task]] = {'status': 'TIMEOUT', 'ttl': None, 'records': [],
+                                        'error': f'Reverse lookup exceeded {deadline:g}s deadline'}
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return {address: results[address] for address in addresses}
+
+    def query(self, domain: str, record_types: Iterable[str] = DEFAULT_RECORD_TYPES) -> Dict[str, Any]:
+        """Synchronous entry point for query_async"""
+        return asyncio.run(self.query_async(domain, record_types))
+
+    def resolve(self, domain: str, record_type: str) -> Dict[str, Any]:
+        """Synchronous lookup of a single record type"""
+        return asyncio.run(self.query_one_async(domain, record_type))
+
+    def reverse(self, addresses: Iterable[str], deadline: float = None) -> Dict[str, Any]:
+        """Synchronous entry point for reverse_async"""
+        return asyncio.run(self.reverse_async(addresses, deadline))
+
+    def cache_stats(self):
+        """Cache hit/miss counters, or None without a cache"""
+        return self.cache.stats() if self.cache is not None else None
+
+_shared_client = None
+
+def get_dns_client() -> DNSClient516:
+    """Process-wide DNS client with the shared cache, created on first use"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = DNSClient516(cache=open_dns_cache())
+    return _shared_client
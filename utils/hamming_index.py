@@ -0,0 +1,155 @@
+"""
+516 Digital Investigation Tools - Hamming Index
+Multi-index hashing for finding perceptual hashes within a Hamming radius
+"""
+
+from itertools import combinations
+from math import ceil, comb
+import numpy as np
+from utils.hash_matrix import HashMatrix516, popcount64
+
+# Candidate pairs verified per batch, bounding memory on dense clusters
+CANDIDATE_BATCH = 1 << 20
+
+def flip_masks(width, radius):
+    """Every width-bit mask with at most `radius` bits set"""
+    masks = []
+    for distance in range(radius + 1):
+        for positions in combinations(range(width), distance):
+            mask = 0
+            for position in positions:
+                mask |= 1 << position
+            masks.append(mask)
+    return masks
+
+def choose_bands(bits, radius, expected_size):
+    """Band count that minimizes probes times expected bucket size
+
+    By the pigeonhole principle, two hashes within `radius` differ by at
+    most radius // bands bits in at least one band, so each band is
+    searched with that smaller radius. Rounding the band width up can
+    build fewer bands than asked for, so costs use the bands actually built.
+    """
+    best = None
+    for requested in range(1, min(bits, radius + 1) + 1):
+        width = ceil(bits / requested)
+        bands = len(range(0, bits, width))
+        sub_radius = radius // bands
+        probes = sum(comb(width, d) for d in range(sub_radius + 1))
+        cost = bands * probes * max(1.0, expected_size / 2 ** width)
+        if best is None or cost < best[0]:
+            best = (cost, requested)
+    return best[1]
+
+class HammingIndex516:
+    """Finds every pair of hashes within a fixed Hamming radius without comparing all pairs
+
+    Each hash is split into bands. Two hashes can only be within the radius
+    if some band differs by at most the reduced per-band radius, so
+    candidates come from sorted band keys and their flipped neighbours;
+    HashMatrix516 then confirms each candidate with XOR + popcount.
+    Identical hashes are searched once and expanded at the end. When the
+    radius is so large that the bands would not narrow anything, the
+    pairs come from HashMatrix516's tiled scan instead.
+    """
+
+    def __init__(self, bits=64, radius=10, expected_size=100000):
+        if bits > 64:
+            raise ValueError('HammingIndex516 packs hashes into 64 bits')
+        self.bits = bits
+        self.radius = radius
+        width = ceil(bits / choose_bands(bits, radius, expected_size))
+        shifts = range(0, bits, width)
+        # Rounding the width up can leave fewer bands than asked for; the
+        # per-band radius must come from the bands actually used
+        self.sub_radius = radius // len(shifts)
+        # (shift, mask, flips) for each band, lowest bits first; the last band may be narrower
+        self.bands = []
+        for shift in shifts:
+            band_width = min(width, bits - shift)
+            self.bands.append((shift, (1 << band_width) - 1, flip_masks(band_width, self.sub_radius)))
+        # Share of all pairs expected to come out as candidates; at large radii
+        # the bands stop filtering and the tiled all-vs-all scan is cheaper
+        self.candidate_fraction = len(self.bands) * len(self.bands[0][2]) / 2 ** width
+
+    def pairs(self, entries):
+        """Yield (id1, id2, distance) for every pair of entries within the radius, each pair once
+
+        Entries are (item_id, hash_value); id1 is always the earlier entry.
+        """
+        entries = list(entries)
+        if not entries:
+            return
+        ids = [item_id for item_id, _ in entries]
+        values, inverse = np.unique(
+            HashMatrix516([value for _, value in entries]).hashes, return_inverse=True
+        )
+        members = [[] for _ in range(len(values))]
+        for position, unique in enumerate(inverse.tolist()):
+            members[unique].append(position)
+
+        # Entries sharing one hash are at distance 0 from each other
+        for group in members:
+            for a, b in combinations(group, 2):
+                yield ids[a], ids[b], 0
+        for u, v, distance in self._unique_pairs(HashMatrix516(values)):
+            for a in members[u]:
+                for b in members[v]:
+                    yield (ids[a], ids[b], distance) if a < b else (ids[b], ids[a], distance)
+
+    def _band_keys(self, values):
+        return [((values >> np.uint64(shift)) & np.uint64(mask)) for shift, mask, _ in self.bands]
+
+    def _unique_pairs(self, matrix):
+        """(u, v, distance) over distinct hashes u < v within the radius"""
+        if self.candidate_fraction >= 1:
+            for rows, cols, distances in matrix.pairs(self.radius):
+                yield from zip(rows.tolist(), cols.tolist(), distances.tolist())
+            return
+
+        keys = self._band_keys(matrix.hashes)
+        sub_radius = np.uint8(self.sub_radius)
+
+        for band, (_, _, flips) in enumerate(self.bands):
+            order = np.argsort(keys[band], kind='stable')
+            bucket_keys, starts, counts = np.unique(keys[band][order], return_index=True, return_counts=True)
+
+            for flip in flips:
+                neighbours = bucket_keys ^ np.uint64(flip)
+                slots = np.searchsorted(bucket_keys, neighbours)
+                slots[slots == len(bucket_keys)] = 0
+                # Each unordered pair of buckets once; flip 0 pairs a bucket with itself
+                hit = bucket_keys[slots] == neighbours
+                if flip:
+                    hit &= neighbours > bucket_keys
+                left, right = np.flatnonzero(hit), slots[hit]
+
+                for u, v in self._bucket_products(order, starts, counts, left, right):
+                    if flip == 0:
+                        keep = u < v
+                        u, v = u[keep], v[keep]
+                    # A pair that is a candidate in an earlier band was already reported there
+                    for earlier in range(band):
+                        near = popcount64(keys[earlier][u] ^ keys[earlier][v]) <= sub_radius
+                        u, v = u[~near], v[~near]
+                    distances = matrix.pair_distances(u, v)
+                    keep = distances <= self.radius
+                    u, v, distances = u[keep], v[keep], distances[keep]
+                    swap = u > v
+                    u[swap], v[swap] = v[swap], u[swap]
+                    yield from zip(u.tolist(), v.tolist(), distances.tolist())
+
+    @staticmethod
+    def _bucket_products(order, starts, counts, left, right):
+        """Yield (u, v) arrays for every member pair of each matched bucket pair, in bounded batches"""
+        sizes = counts[left] * counts[right]
+        ends = np.cumsum(sizes)
+        begin = 0
+        while begin < len(sizes):
+            end = max(begin + 1, int(np.searchsorted(ends, ends[begin] - sizes[begin] + CANDIDATE_BATCH, side='right')))
+            l, r, batch_sizes = left[begin:end], right[begin:end], sizes[begin:end]
+            pair = np.repeat(np.arange(len(batch_sizes)), batch_sizes)
+            offset = np.arange(batch_sizes.sum()) - np.repeat(np.cumsum(batch_sizes) - batch_sizes, batch_sizes)
+            width = counts[r][pair]
+            yield order[starts[l][pair] + offset // width], order[starts[r][pair] + offset % width]
+            begin = end
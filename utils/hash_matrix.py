@@ -0,0 +1,90 @@
+"""
+516 Digital Investigation Tools - Hash Matrix
+Vectorized Hamming distances over packed 64-bit perceptual hashes
+"""
+
+import numpy as np
+from utils.config_loader import config
+
+if hasattr(np, 'bitwise_count'):
+    def popcount64(values, out=None):
+        """Set bits per element of a uint64 array"""
+        return np.bitwise_count(values, out=out)
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount64(values, out=None):
+        """Set bits per element of a uint64 array (byte lookup table for NumPy < 2.0)"""
+        counts = _BYTE_COUNTS[values.view(np.uint8)].reshape(*values.shape, 8).sum(axis=-1, dtype=np.uint8)
+        if out is None:
+            return counts
+        out[...] = counts
+        return out
+
+def pack_hashes(hashes):
+    """uint64 array from hex strings, ints or 64-bit ImageHash objects"""
+    packed = np.empty(len(hashes), dtype=np.uint64)
+    for i, value in enumerate(hashes):
+        if isinstance(value, str):
+            value = int(value, 16)
+        elif not isinstance(value, int):
+            value = int(str(value), 16)
+        packed[i] = value
+    return packed
+
+class HashMatrix516:
+    """64-bit hashes held as one packed uint64 array
+
+    Distances are XOR plus popcount over whole arrays. All-vs-all work is
+    done in square tiles of the upper triangle, so memory stays at
+    tile_size ** 2 values however many hashes there are.
+    """
+
+    def __init__(self, hashes, tile_size=None):
+        self.hashes = hashes if isinstance(hashes, np.ndarray) else pack_hashes(hashes)
+        self.tile_size = tile_size or config.get('default', 'image_forensics.tile_size', 256)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def distances(self, hash_value):
+        """Distance from one hash to every stored hash, as a uint8 array"""
+        return popcount64(self.hashes ^ pack_hashes([hash_value])[0])
+
+    def distance(self, i, j):
+        """Distance between two stored hashes"""
+        return int(popcount64(self.hashes[i] ^ self.hashes[j]))
+
+    def pair_distances(self, rows, cols):
+        """Distances for index arrays of candidate pairs (rows[k], cols[k])"""
+        return popcount64(self.hashes[rows] ^ self.hashes[cols])
+
+    def pairs(self, threshold):
+        """Yield (i, j, distance) arrays per tile for every pair i < j within threshold"""
+        count = len(self.hashes)
+        size = self.tile_size
+        # Scratch buffers reused by every full tile, so the loop allocates nothing large
+        xor = np.empty((size, size), dtype=np.uint64)
+        bits = np.empty((size, size), dtype=np.uint8)
+        within = np.empty((size, size), dtype=bool)
+        upper = np.triu(np.ones((size, size), dtype=bool), k=1)
+
+        for row in range(0, count, size):
+            rows = self.hashes[row:row + size, None]
+            for col in range(row, count, size):
+                cols = self.hashes[None, col:col + size]
+                shape = (rows.shape[0], cols.shape[1])
+                tile_xor, tile_bits, tile_within = (
+                    buffer[:shape[0], :shape[1]] for buffer in (xor, bits, within)
+                )
+                np.bitwise_xor(rows, cols, out=tile_xor)
+                popcount64(tile_xor, out=tile_bits)
+                np.less_equal(tile_bits, threshold, out=tile_within)
+                if col == row:
+                    tile_within &= upper[:shape[0], :shape[1]]
+                if not tile_within.any():
+                    continue
+                # flatnonzero is far cheaper than a 2-D nonzero on sparse tiles
+                flat = np.flatnonzero(tile_within)
+                i, j = np.divmod(flat, shape[1])
+                yield i + row, j + col, tile_bits.ravel()[flat]
@@ -5,6 +5,7 @@ Common helper functions for the digital investigation toolkit
 
 import json
 import os
+import sys
 from datetime import datetime
 import hashlib
 
@@ -39,6 +40,23 @@ def validate_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
+def read_targets(source):
+    """Read unique, non-empty targets from a file path, or stdin when source is '-'"""
+    if source == '-':
+        lines = sys.stdin
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    
+    targets = []
+    seen = set()
+    for line in lines:
+        target = line.strip()
+        if target and not target.startswith('#') and target not in seen:
+            seen.add(target)
+            targets.append(target)
+    return targets
+
 def print_banner():
     """Print 516 Digital Investigation Tools banner"""
     banner = """
@@ -0,0 +1,136 @@
+"""
+516 Digital Investigation Tools - HTTP Header Inspector
+Header-only inspection over pooled keep-alive connections
+"""
+
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from utils.config_loader import config
+
+SECURITY_HEADERS = (
+    'Strict-Transport-Security',
+    'Content-Security-Policy',
+    'X-Frame-Options',
+    'X-Content-Type-Options',
+    'X-XSS-Protection'
+)
+
+class HeaderInspector516:
+    """Follows a domain's redirect chain reading headers only
+
+    Every hop tries HEAD first and falls back to a streamed GET that is
+    closed as soon as the headers arrive (tiny bodies are drained so the
+    connection stays in the pool). HTTPS is tried before plain HTTP.
+    """
+
+    def __init__(self, max_workers=None, timeout=None, max_redirects=10):
+        self.max_workers = max_workers or config.get('default', 'settings.max_workers', 5)
+        self.timeout = timeout or config.get('default', 'settings.request_timeout', 10)
+        self.max_redirects = max_redirects
+        self.drain_limit = config.get('default', 'settings.probe_drain_bytes', 4096)
+        self.head_unsupported = set()
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def inspect(self, domain):
+        """Headers, redirect chain and per-hop timing for a domain"""
+        errors = {}
+        for scheme in ('https', 'http'):
+            try:
+                result = self.follow(f"{scheme}://{domain}/")
+            except requests.RequestException as e:
+                errors[scheme] = str(e)
+                continue
+            result['schemes_failed'] = errors
+            return result
+        return {'error': '; '.join(f"{scheme}: {error}" for scheme, error in errors.items())}
+
+    def follow(self, url):
+        """Walk redirects from url by hand so each hop can be timed"""
+        chain = []
+        transferred = 0
+        started = time.monotonic()
+
+        for _ in range(self.max_redirects + 1):
+            response, method, seconds = self._request_headers(url)
+            transferred += self._bytes_transferred(response)
+            location = response.headers.get('Location') if response.is_redirect else None
+            chain.append({
+                'url': url,
+                'status_code': response.status_code,
+                'method': method,
+                'seconds': round(seconds, 4),
+                'location': location
+            })
+            if location is None:
+                break
+            url = urljoin(url, location)
+
+        result = {
+            'status_code': response.status_code,
+            'final_url': response.url,
+            'headers': dict(response.headers),
+            'server': response.headers.get('Server', 'Unknown'),
+            'content_type': response.headers.get('Content-Type', 'Unknown'),
+            'security_headers': {header: response.headers.get(header, 'Not Present') for header in SECURITY_HEADERS},
+            'redirect_chain': chain,
+            'redirects': len(chain) - 1,
+            'total_seconds': round(time.monotonic() - started, 4),
+            'bytes_transferred': transferred
+        }
+        if location is not None:
+            # Still redirecting after max_redirects hops, where requests would raise TooManyRedirects
+            result['redirect_limit_reached'] = True
+            result['error'] = f"Exceeded {self.max_redirects} redirects"
+        return result
+
+    def _request_headers(self, url):
+        """One hop: HEAD if the host allows it, otherwise a GET closed after the headers"""
+        host = urlsplit(url).netloc
+        started = time.monotonic()
+
+        if host not in self.head_unsupported:
+            response = self.session.head(url, timeout=self.timeout, allow_redirects=False)
+            if response.status_code not in (405, 501):
+                return response, 'HEAD', time.monotonic() - started
+            with self._lock:
+                self.head_unsupported.add(host)
+            started = time.monotonic()
+
+        response = self.session.get(url, timeout=self.timeout, allow_redirects=False, stream=True)
+        seconds = time.monotonic() - started
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) <= self.drain_limit:
+            for _ in response.iter_content(chunk_size=8192):
+                pass
+        response.close()
+        return response, 'GET', seconds
+
+    def _bytes_transferred(self, response):
+        """Approximate wire bytes for one hop: status line, headers and any body read"""
+        total = len(f"HTTP/1.1 {response.status_code} {response.reason}\r\n\r\n")
+        total += sum(len(name) + len(value) + 4 for name, value in response.headers.items())
+        if response.raw is not None:
+            total += response.raw.tell()
+        return total
+
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
+
+_shared_inspector = None
+_shared_lock = threading.Lock()
+
+def get_header_inspector():
+    """Process-wide inspector, so bulk audits share one connection pool"""
+    global _shared_inspector
+    with _shared_lock:
+        if _shared_inspector is None:
+            _shared_inspector = HeaderInspector516()
+        return _shared_inspector
@@ -0,0 +1,53 @@
+"""
+516 Digital Investigation Tools - Image Hashing
+Decode-once perceptual hashing from shared downscaled buffers
+"""
+
+import imagehash
+from PIL import Image
+from utils.config_loader import config
+
+HASH_FUNCTIONS = {
+    'average_hash': imagehash.average_hash,
+    'phash': imagehash.phash,
+    'dhash': imagehash.dhash,
+    'whash': imagehash.whash,
+    'color_hash': imagehash.colorhash
+}
+HASH_TYPES = tuple(HASH_FUNCTIONS)
+
+def _reduce(img, decode_size):
+    """Box-reduce so the short side stays at least decode_size"""
+    factor = min(img.size) // decode_size
+    return img.reduce(factor) if factor > 1 else img
+
+def hash_image(img, hash_types=HASH_TYPES, decode_size=None):
+    """{hash_type: ImageHash} for an open, not yet loaded image
+
+    JPEGs are decoded in draft mode at the smallest DCT scale that keeps
+    the short side at decode_size pixels, and grayscale-only requests are
+    decoded straight to luma. Every hash is then taken from one shared
+    grayscale buffer (plus an RGB buffer for color_hash) of that size,
+    instead of each hash converting and resizing the full image again.
+    whash picks its wavelet scale from the buffer, so on large images it
+    works at the decode size rather than the original resolution.
+    """
+    unknown = set(hash_types) - set(HASH_FUNCTIONS)
+    if unknown:
+        raise ValueError(f"Unknown hash types: {', '.join(sorted(unknown))}")
+    decode_size = decode_size or config.get('default', 'image_forensics.decode_size', 256)
+    needs_color = 'color_hash' in hash_types
+
+    img.draft('RGB' if needs_color else 'L', (decode_size, decode_size))
+    gray = _reduce(img.convert('L'), decode_size)
+    color = _reduce(img.convert('RGB'), decode_size) if needs_color else None
+
+    return {
+        hash_type: HASH_FUNCTIONS[hash_type](color if hash_type == 'color_hash' else gray)
+        for hash_type in hash_types
+    }
+
+def hash_file(path, hash_types=HASH_TYPES, decode_size=None):
+    """hash_image for a file on disk"""
+    with Image.open(path) as img:
+        return hash_image(img, hash_types, decode_size)
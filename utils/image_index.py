@@ -0,0 +1,255 @@
+"""
+516 Digital Investigation Tools - Image Hash Index
+Persistent perceptual hash index with incremental updates and band lookups
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from utils.hamming_index import flip_masks
+from utils.hash_matrix import HashMatrix516
+from utils.helpers import calculate_file_hash
+from utils.image_hashing import HASH_TYPES
+from utils.process_pool import map_files
+
+SUPPORTED_FORMATS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp')
+
+# 64-bit hashes stored as packed INTEGER columns; color_hash is not 64-bit and stays hex
+INT_HASHES = tuple(name for name in HASH_TYPES if name != 'color_hash')
+
+# average_hash is split into four 16-bit bands, each with its own SQL index
+BAND_COUNT = 4
+BAND_BITS = 16
+
+# Rows written per transaction during update_directory
+COMMIT_EVERY = 500
+
+def _to_signed(value):
+    """uint64 -> SQLite's signed 64-bit INTEGER"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+def _prefix_range(directory):
+    """(low, high) bounds selecting every path under directory
+
+    A range rather than LIKE, where '_' and '%' in directory names would
+    act as wildcards.
+    """
+    prefix = os.path.join(os.path.abspath(directory), '')
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def _bands(value):
+    return [(value >> (band * BAND_BITS)) & 0xFFFF for band in range(BAND_COUNT)]
+
+class ImageIndex516:
+    """SQLite index of file identity plus the five perceptual hashes per image
+
+    Files whose size and mtime are unchanged are skipped on re-index; a
+    touched file with the same content digest keeps its hashes. Queries on
+    average_hash use the band columns (multi-index hashing), so only images
+    sharing a near band value are ever read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        band_columns = ''.join(f"band{band} INTEGER NOT NULL,\n" for band in range(BAND_COUNT))
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS image_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                average_hash INTEGER NOT NULL,
+                phash INTEGER NOT NULL,
+                dhash INTEGER NOT NULL,
+                whash INTEGER NOT NULL,
+                color_hash TEXT NOT NULL,
+                {band_columns}indexed_at REAL NOT NULL
+            )
+        """)
+        for band in range(BAND_COUNT):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_band{band} ON image_hashes (band{band})")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_digest ON image_hashes (digest)")
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM image_hashes").fetchone()[0]
+
+    def update_directory(self, directory, hasher, recursive=False, workers=None):
+        """Bring the index in line with a directory; returns counts of what was done
+
+        hasher(path) returns the calculate_hashes dict for one image. New
+        content is hashed on a process pool (see map_files), so hasher must
+        be picklable. Rows are committed every COMMIT_EVERY files and once
+        more at the end, so an interrupted update keeps what it stored.
+        """
+        try:
+            return self._update_directory(directory, hasher, recursive, workers)
+        finally:
+            self._commit()
+
+    def _update_directory(self, directory, hasher, recursive, workers):
+        stats = {'scanned': 0, 'unchanged': 0, 'touched': 0, 'hashed': 0, 'errors': 0, 'removed': 0}
+        seen = set()
+        pending = {}
+
+        for path in self._image_paths(directory, recursive):
+            stats['scanned'] += 1
+            seen.add(path)
+            stat = os.stat(path)
+            row = self._identity(path)
+            if row is not None and row == (stat.st_size, stat.st_mtime_ns):
+                stats['unchanged'] += 1
+                continue
+
+            digest = calculate_file_hash(path, 'sha256')
+            known = self._hashes_for_digest(digest)
+            if known is not None:
+                # Same bytes already indexed (touched, copied or renamed): reuse its hashes
+                self._store(path, stat, digest, known)
+                stats['touched'] += 1
+                continue
+            # Copies of the same new file are hashed once
+            pending.setdefault(digest, []).append((path, stat))
+
+        first_paths = {files[0][0]: digest for digest, files in pending.items()}
+        for path, hashes, error in map_files(hasher, list(first_paths), workers=workers):
+            files = pending[first_paths[path]]
+            if error is not None or 'error' in hashes:
+                stats['errors'] += len(files)
+                continue
+            for copy_path, stat in files:
+                self._store(copy_path, stat, first_paths[path], hashes)
+            stats['hashed'] += 1
+            stats['touched'] += len(files) - 1
+
+        stats['removed'] = self._prune(directory, seen, recursive)
+        return stats
+
+    def _image_paths(self, directory, recursive):
+        directory = os.path.abspath(directory)
+        if recursive:
+            for root, _, files in os.walk(directory):
+                for filename in sorted(files):
+                    if filename.lower().endswith(SUPPORTED_FORMATS):
+                        yield os.path.join(root, filename)
+        else:
+            for filename in sorted(os.listdir(directory)):
+                path = os.path.join(directory, filename)
+                if filename.lower().endswith(SUPPORTED_FORMATS) and os.path.isfile(path):
+                    yield path
+
+    def _identity(self, path):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT size, mtime_ns FROM image_hashes WHERE path = ?", (path,)
+            ).fetchone()
+
+    def _hashes_for_digest(self, digest):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(HASH_TYPES)} FROM image_hashes WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+        if row is None:
+            return None
+        hashes = {name: format(_to_unsigned(value), '016x') for name, value in zip(INT_HASHES, row)}
+        hashes['color_hash'] = row[-1]
+        return hashes
+
+    def _store(self, path, stat, digest, hashes):
+        values = [_to_signed(int(hashes[name], 16)) for name in INT_HASHES]
+        bands = _bands(int(hashes['average_hash'], 16))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO image_hashes (path, size, mtime_ns, digest, {', '.join(HASH_TYPES)}, "
+                f"{', '.join(f'band{band}' for band in range(BAND_COUNT))}, indexed_at) "
+                f"VALUES ({', '.join('?' * (4 + len(HASH_TYPES) + BAND_COUNT + 1))})",
+                [path, stat.st_size, stat.st_mtime_ns, digest, *values, hashes['color_hash'], *bands, time.time()]
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self._conn.commit()
+                self._uncommitted = 0
+
+    def _commit(self):
+        with self._lock:
+            self._conn.commit()
+            self._uncommitted = 0
+
+    def _prune(self, directory, seen, recursive):
+        """Drop rows for files under directory that no longer exist"""
+        directory = os.path.abspath(directory)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM image_hashes WHERE path >= ? AND path < ?", _prefix_range(directory)
+            ).fetchall()
+            stale = [
+                path for (path,) in rows
+                if path not in seen and (recursive or os.path.dirname(path) == directory)
+            ]
+            self._conn.executemany("DELETE FROM image_hashes WHERE path = ?", [(path,) for path in stale])
+        return len(stale)
+
+    def entries(self, hash_type='average_hash', directory=None):
+        """(path, hash as int) for every indexed image, optionally under one directory"""
+        sql = f"SELECT path, {hash_type} FROM image_hashes"
+        params = ()
+        if directory is not None:
+            sql += " WHERE path >= ? AND path < ?"
+            params = _prefix_range(directory)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY path", params).fetchall()
+        if hash_type == 'color_hash':
+            return [(path, int(value, 16)) for path, value in rows]
+        return [(path, _to_unsigned(value)) for path, value in rows]
+
+    def query(self, hash_hex, threshold=10, hash_type='average_hash'):
+        """[{'path', 'hash_difference', 'similarity_score'}] within threshold, closest first"""
+        target = int(hash_hex, 16)
+        bits = len(hash_hex) * 4
+        if hash_type == 'average_hash':
+            candidates = self._band_candidates(target, threshold)
+        else:
+            candidates = self.entries(hash_type)
+
+        if not candidates:
+            return []
+        paths, values = zip(*candidates)
+        distances = HashMatrix516(list(values)).distances(target).tolist()
+        matches = [
+            {
+                'path': path,
+                'hash_difference': distance,
+                'similarity_score': round(100 - (distance / bits) * 100, 2)
+            }
+            for path, distance in zip(paths, distances) if distance <= threshold
+        ]
+        return sorted(matches, key=lambda match: (match['hash_difference'], match['path']))
+
+    def _band_candidates(self, target, threshold):
+        """Rows sharing at least one band within threshold // BAND_COUNT bits of the target"""
+        flips = flip_masks(BAND_BITS, threshold // BAND_COUNT)
+        candidates = {}
+        with self._lock:
+            for band, key in enumerate(_bands(target)):
+                values = sorted({key ^ flip for flip in flips})
+                for start in range(0, len(values), 500):
+                    chunk = values[start:start + 500]
+                    rows = self._conn.execute(
+                        f"SELECT path, average_hash FROM image_hashes "
+                        f"WHERE band{band} IN ({', '.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    candidates.update(rows)
+        return [(path, _to_unsigned(value)) for path, value in candidates.items()]
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            self._conn.close()
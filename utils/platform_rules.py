@@ -0,0 +1,88 @@
+"""
+516 Digital Investigation Tools - Platform Rule Engine
+Compiles config/social_platforms.json into reusable probe descriptors
+"""
+
+from typing import Dict, Any
+from urllib.parse import urlsplit
+from utils.config_loader import config
+
+CHECK_TYPES = ('http_status', 'head', 'redirect', 'body_marker')
+DEFAULT_MAX_BYTES = 65536
+
+class PlatformRule516:
+    """Precompiled probe descriptor for a single platform"""
+
+    def __init__(self, key, url, name=None, check_type='http_status', accepted_codes=None,
+                 max_bytes=DEFAULT_MAX_BYTES, not_found_marker=None, category=None,
+                 rate_limit=None, throttle_codes=None, supports_head=False):
+        if check_type not in CHECK_TYPES:
+            raise ValueError(f"Unknown check_type '{check_type}' for platform '{key}'")
+        if check_type == 'body_marker' and not not_found_marker:
+            raise ValueError(f"Platform '{key}' uses body_marker but defines no not_found_marker")
+
+        self.key = key
+        self.name = name or key
+        self.url_template = url
+        self.check_type = check_type
+        self.accepted_codes = frozenset(accepted_codes or [200])
+        self.throttle_codes = frozenset(throttle_codes or [429])
+        # Status and redirect checks can use HEAD where the platform answers it
+        # faithfully; body checks always need a (capped) GET
+        self.use_head = check_type == 'head' or (supports_head and check_type != 'body_marker')
+        self.max_bytes = int(max_bytes)
+        self.not_found_marker = not_found_marker.encode('utf-8') if not_found_marker else None
+        self.category = category
+        self.rate_limit = rate_limit
+        self._format = url.format
+        self.host = urlsplit(self.url_for('user')).netloc.lower()
+
+    def url_for(self, username):
+        """Build the profile URL for a username"""
+        return self._format(username)
+
+    def probe_key(self, username):
+        """Identity of the probe: rules with the same key fetch and judge identically"""
+        return (self.url_for(username), self.check_type, self.use_head, self.accepted_codes,
+                self.throttle_codes, self.not_found_marker, self.max_bytes)
+
+    def evaluate(self, status_code, body=None):
+        """Decide whether a probe response means the profile exists"""
+        if self.check_type == 'redirect' and 300 <= status_code < 400:
+            return False
+        if status_code not in self.accepted_codes:
+            return False
+        if self.check_type == 'body_marker':
+            return body is not None and self.not_found_marker not in body
+        return True
+
+    def __repr__(self):
+        return f"PlatformRule516({self.key!r}, {self.check_type!r})"
+
+def compile_platform_rules(platforms: Dict[str, Any]) -> Dict[str, PlatformRule516]:
+    """Compile a {key: platform config} mapping into probe descriptors"""
+    rules = {}
+    for key, spec in platforms.items():
+        rules[key] = PlatformRule516(
+            key,
+            spec['url'],
+            name=spec.get('name'),
+            check_type=spec.get('check_type', 'http_status'),
+            accepted_codes=spec.get('accepted_codes'),
+            max_bytes=spec.get('max_bytes', DEFAULT_MAX_BYTES),
+            not_found_marker=spec.get('not_found_marker'),
+            category=spec.get('category'),
+            rate_limit=spec.get('rate_limit'),
+            throttle_codes=spec.get('throttle_codes'),
+            supports_head=spec.get('supports_head', False)
+        )
+    return rules
+
+_compiled_rules = None
+
+def load_platform_rules() -> Dict[str, PlatformRule516]:
+    """Return the compiled rules for the configured platforms, compiling them once"""
+    global _compiled_rules
+    if _compiled_rules is None:
+        _compiled_rules = compile_platform_rules(config.get_platforms())
+    return _compiled_rules
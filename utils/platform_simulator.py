@@ -0,0 +1,129 @@
+"""
+516 Digital Investigation Tools - Platform Simulator
+Local HTTP stand-ins for social platforms, for benchmarks and tests
+"""
+
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from utils.platform_rules import compile_platform_rules
+
+DEFAULT_ROUTE = {
+    'latency': 0.02,
+    'status': 200,
+    'body_size': 50000,
+    'supports_head': True,
+    'burst_every': 0,
+    'burst_length': 0
+}
+
+class _RouteState:
+    """Route behaviour plus the counters that drive its 429 bursts"""
+
+    def __init__(self, spec):
+        self.spec = dict(DEFAULT_ROUTE, **spec)
+        self.body = b'x' * self.spec['body_size']
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def next_status(self):
+        """Status for the next request, inserting 429 bursts when configured"""
+        with self._lock:
+            self.requests += 1
+            every, length = self.spec['burst_every'], self.spec['burst_length']
+            if every and length and (self.requests % every) < length:
+                self.throttled += 1
+                return 429
+            return self.spec['status']
+
+class _PlatformHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # Status-only probes hang up once they have the headers
+            pass
+
+    def do_HEAD(self):
+        if not self.server.route.spec['supports_head']:
+            self._reply(405, b'')
+        else:
+            self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        route = self.server.route
+        time.sleep(route.spec['latency'])
+        status = route.next_status()
+        self._reply(status, route.body if status == 200 else b'', send_body)
+
+    def _reply(self, status, body, send_body=True):
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body and body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class PlatformSimulator516:
+    """One local server per platform, so each keeps its own host, bucket and window"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.servers = {}
+
+    def start(self):
+        """Start a server thread for every route"""
+        for platform, spec in self.routes.items():
+            server = ThreadingHTTPServer(('127.0.0.1', 0), _PlatformHandler)
+            server.daemon_threads = True
+            server.route = _RouteState(spec)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers[platform] = server
+        return self
+
+    def stop(self):
+        """Shut every server down"""
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+        self.servers = {}
+
+    def base_url(self, platform):
+        """Root URL of a platform's stand-in server"""
+        return f"http://127.0.0.1:{self.servers[platform].server_address[1]}"
+
+    def rules_for(self, platforms):
+        """Compile {key: platform config} rules with their URLs pointed at the simulator"""
+        specs = {}
+        for key, spec in platforms.items():
+            if key not in self.servers:
+                continue
+            parts = urlsplit(spec['url'])
+            path = parts.path + (f"?{parts.query}" if parts.query else '')
+            specs[key] = dict(spec, url=self.base_url(key) + path)
+        return compile_platform_rules(specs)
+
+    def stats(self):
+        """Requests served and 429s issued per platform"""
+        return {
+            platform: {'requests': server.route.requests, 'throttled': server.route.throttled}
+            for platform, server in self.servers.items()
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,106 @@
+"""
+516 Digital Investigation Tools - Probe Cache
+Persistent TTL cache of username/platform probe outcomes
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from utils.config_loader import config
+
+def normalize_username(username):
+    """Canonical form used for cache keys"""
+    return username.strip().lower()
+
+class ProbeCache516:
+    """SQLite-backed cache keyed by (platform, normalized username)
+
+    Positive and negative outcomes expire separately; errors are never
+    cached since they say nothing about the profile.
+    """
+
+    def __init__(self, path, positive_ttl=86400, negative_ttl=3600, refresh=False):
+        self.path = path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS probe_outcomes (
+                platform TEXT NOT NULL,
+                username TEXT NOT NULL,
+                url TEXT NOT NULL,
+                found INTEGER NOT NULL,
+                status_code INTEGER,
+                response_time REAL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (platform, username)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, platform, username):
+        """Return the cached outcome if still fresh, otherwise None"""
+        if self.refresh:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, found, status_code, response_time, fetched_at "
+                "FROM probe_outcomes WHERE platform = ? AND username = ?",
+                (platform, normalize_username(username))
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        url, found, status_code, response_time, fetched_at = row
+        ttl = self.positive_ttl if found else self.negative_ttl
+        if time.time() - fetched_at > ttl:
+            return None
+
+        return {
+            'url': url,
+            'exists': bool(found),
+            'status_code': status_code,
+            'response_time': response_time,
+            'cached': True,
+            'fetched_at': datetime.fromtimestamp(fetched_at).isoformat()
+        }
+
+    def put(self, platform, username, outcome):
+        """Store a probe outcome; errored probes are skipped"""
+        if 'error' in outcome:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probe_outcomes "
+                "(platform, username, url, found, status_code, response_time, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (platform, normalize_username(username), outcome['url'], int(outcome['exists']),
+                 outcome.get('status_code'), outcome.get('response_time'), time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            self._conn.close()
+
+def open_probe_cache(output_dir, refresh=False):
+    """Open the probe cache under output_dir, or None when disabled in config"""
+    settings = config.get('default', 'probe_cache', {})
+    if not settings.get('enabled', True):
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    return ProbeCache516(
+        os.path.join(output_dir, settings.get('filename', 'probe_cache.sqlite')),
+        positive_ttl=settings.get('positive_ttl', 86400),
+        negative_ttl=settings.get('negative_ttl', 3600),
+        refresh=refresh
+    )
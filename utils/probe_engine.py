@@ -0,0 +1,259 @@
+"""
+516 Digital Investigation Tools - Async Probe Engine
+Concurrent HTTP probing over a shared connection pool
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from utils.config_loader import config
+from utils.adaptive_concurrency import AdaptiveWindow516
+
+class ProbeEngine516:
+    def __init__(self, max_workers=None, timeout=None, cache=None):
+        self.max_workers = max_workers or config.get('default', 'settings.max_workers', 5)
+        self.timeout = timeout or config.get('default', 'settings.request_timeout', 10)
+        self.cache = cache
+        self.adaptive = config.get('default', 'adaptive_concurrency', {})
+        self.max_retries = self.adaptive.get('max_retries', 3)
+        self.windows = {}
+        self.head_unsupported = set()
+        self.drain_limit = config.get('default', 'settings.probe_drain_bytes', 4096)
+        self.session = self._build_session()
+
+    def _build_session(self):
+        """Create a session whose pool can serve every worker at once"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def cached_outcome(self, rule, username):
+        """Fresh cached outcome for a rule, or None"""
+        if self.cache is None:
+            return None
+        return self.cache.get(rule.key, username)
+
+    def run_rule(self, rule, username):
+        """Execute a platform rule (blocking), answering from the cache when fresh"""
+        outcome = self.cached_outcome(rule, username)
+        if outcome is None:
+            outcome = self._execute_rule(rule, username)
+            if self.cache is not None:
+                self.cache.put(rule.key, username, outcome)
+        return outcome
+
+    def _execute_rule(self, rule, username):
+        """Fetch only what the rule needs and evaluate the response"""
+        url = rule.url_for(username)
+        started = time.monotonic()
+        follow = rule.check_type != 'redirect'
+        transferred = 0
+        try:
+            body = None
+            response = None
+            if rule.use_head and rule.key not in self.head_unsupported:
+                response = self.session.head(url, timeout=self.timeout, allow_redirects=follow)
+                if response.status_code in (405, 501):
+                    # Remember platforms that refuse HEAD and stop asking them
+                    self.head_unsupported.add(rule.key)
+                    transferred += self._bytes_transferred(response)
+                    response = None
+
+            if response is None:
+                # Stream so that nothing past the headers is read unless the rule needs it
+                response = self.session.get(url, timeout=self.timeout, stream=True, allow_redirects=follow)
+                with response:
+                    if rule.check_type == 'body_marker':
+                        body = self._read_capped(response, rule.max_bytes, rule.not_found_marker)
+                    else:
+                        self._drain_if_small(response)
+            transferred += self._bytes_transferred(response)
+
+            outcome = {
+                'url': url,
+                'status_code': response.status_code,
+                'response_time': response.elapsed.total_seconds(),
+                'method': response.request.method,
+                'bytes_transferred': transferred
+            }
+
+            if response.status_code in rule.throttle_codes:
+                outcome['exists'] = False
+                outcome['throttled'] = True
+                outcome['error'] = f"Throttled (HTTP {response.status_code})"
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    outcome['retry_after'] = int(retry_after)
+            else:
+                outcome['exists'] = rule.evaluate(response.status_code, body=body)
+            return outcome
+        except requests.exceptions.Timeout as e:
+            return {
+                'url': url,
+                'exists': False,
+                'throttled': True,
+                'error': f"Timed out: {e}",
+                'response_time': time.monotonic() - started,
+                'bytes_transferred': transferred
+            }
+        except Exception as e:
+            return {
+                'url': url,
+                'exists': False,
+                'error': str(e),
+                'response_time': time.monotonic() - started,
+                'bytes_transferred': transferred
+            }
+
+    def _drain_if_small(self, response):
+        """Read tiny bodies to the end so their connection goes back to the pool
+
+        Closing a response with unread body bytes discards the connection;
+        for a few hundred bytes a reconnect costs more than the read.
+        """
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) <= self.drain_limit:
+            for _ in response.iter_content(chunk_size=8192):
+                pass
+
+    def _bytes_transferred(self, response):
+        """Approximate wire bytes: status line and headers of every hop plus body bytes read"""
+        total = 0
+        for hop in response.history + [response]:
+            total += len(f"HTTP/1.1 {hop.status_code} {hop.reason}\r\n\r\n")
+            total += sum(len(name) + len(value) + 4 for name, value in hop.headers.items())
+            if hop.raw is not None:
+                total += hop.raw.tell()
+        return total
+
+    def _read_capped(self, response, max_bytes, marker=None):
+        """Read at most max_bytes of the body, stopping early once marker is seen"""
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=min(8192, max_bytes)):
+            body.extend(chunk)
+            if len(body) >= max_bytes or (marker and marker in body):
+                break
+        return bytes(body[:max_bytes])
+
+    def window_for(self, rule):
+        """Adaptive concurrency window for the rule's platform"""
+        if rule.key not in self.windows:
+            self.windows[rule.key] = AdaptiveWindow516(
+                initial=self.adaptive.get('initial_window', 2),
+                maximum=self.adaptive.get('max_window', 16),
+                latency_factor=self.adaptive.get('latency_factor', 2.0),
+                backoff_base=self.adaptive.get('backoff_base', 1.0),
+                backoff_max=self.adaptive.get('backoff_max', 60.0)
+            )
+        return self.windows[rule.key]
+
+    async def probe_rule_async(self, rule, username, executor, slots, pace=None, held=False):
+        """Probe under the platform's adaptive window, retrying throttled attempts with backoff
+
+        `pace` is an optional coroutine function awaited before every network
+        attempt; `held` means the caller already owns a window slot for the
+        first attempt.
+        """
+        loop = asyncio.get_running_loop()
+        window = self.window_for(rule)
+        attempt = 0
+        while True:
+            if not held:
+                await window.acquire()
+            held = False
+            outcome = None
+            try:
+                if pace is not None:
+                    await pace()
+                async with slots:
+                    outcome = await loop.run_in_executor(executor, self.run_rule, rule, username)
+            finally:
+                window.release(outcome)
+
+            if not outcome.get('throttled') or attempt >= self.max_retries:
+                if attempt:
+                    outcome['attempts'] = attempt + 1
+                return outcome
+
+            # Back off outside the window so other probes keep flowing
+            await asyncio.sleep(window.backoff(attempt, outcome.get('retry_after')))
+            attempt += 1
+
+    async def probe_rules_async(self, rules, username, on_result=None):
+        """Run every {key: PlatformRule516} rule for a username concurrently
+
+        `on_result(key, outcome)` is called as each probe completes.
+        """
+        slots = asyncio.Semaphore(self.max_workers)
+
+        async def probe(key, rule):
+            outcome = await self.probe_rule_async(rule, username, executor, slots)
+            if on_result:
+                on_result(key, outcome)
+            return outcome
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            outcomes = await asyncio.gather(*(probe(key, rule) for key, rule in rules.items()))
+        return dict(zip(rules.keys(), outcomes))
+
+    def probe_rules(self, rules, username, on_result=None):
+        """Synchronous entry point for probe_rules_async"""
+        return asyncio.run(self.probe_rules_async(rules, username, on_result))
+
+    def close(self):
+        """Release pooled connections and the cache"""
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+class SharedProbeService516(ProbeEngine516):
+    """Probe engine shared by several tools within one scan session
+
+    Identical probes (same URL, same check) are coalesced while in flight
+    and memoized for the rest of the session. Every caller receives its own
+    copy of the outcome, flagged 'deduplicated' when another caller paid
+    for the request. Failed and throttled probes are not memoized.
+    """
+
+    def __init__(self, max_workers=None, timeout=None, cache=None):
+        super().__init__(max_workers, timeout, cache)
+        self._probes = {}
+        self._probes_lock = threading.Lock()
+        self.stats = {'probes': 0, 'deduplicated': 0}
+
+    def run_rule(self, rule, username):
+        """Run the probe once per session, sharing it with identical requests"""
+        key = rule.probe_key(username)
+        with self._probes_lock:
+            future = self._probes.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._probes[key] = future
+                self.stats['probes'] += 1
+            else:
+                self.stats['deduplicated'] += 1
+
+        if not owner:
+            outcome = dict(future.result())
+            outcome['deduplicated'] = True
+            return outcome
+
+        try:
+            outcome = super().run_rule(rule, username)
+        except BaseException as e:
+            with self._probes_lock:
+                self._probes.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        if 'error' in outcome:
+            with self._probes_lock:
+                self._probes.pop(key, None)
+        future.set_result(outcome)
+        return dict(outcome)
@@ -0,0 +1,72 @@
+"""
+516 Digital Investigation Tools - Process Pool
+Chunked CPU-bound work over files with a bounded number of chunks in flight
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from utils.config_loader import config
+
+def default_workers():
+    """Worker processes from config, falling back to one per core"""
+    return config.get('default', 'settings.cpu_workers', None) or os.cpu_count() or 1
+
+def _run_chunk(func, items):
+    """Worker side: apply func to each item of a chunk"""
+    results = []
+    for item in items:
+        try:
+            results.append((item, func(item), None))
+        except Exception as e:
+            results.append((item, None, e))
+    return results
+
+def map_files(func, items, workers=None, chunksize=None, ordered=False):
+    """Yield (item, result, error) for func over items on a process pool
+
+    Items are sent in chunks so each round trip carries real work, and at
+    most workers * 2 chunks are queued at a time, so a huge directory never
+    sits in memory as pending futures. With ordered=True results come back
+    in input order; otherwise as soon as each chunk finishes. func must be
+    picklable: a module-level function or a bound method of a picklable
+    object. A single worker runs in-process.
+    """
+    workers = workers or default_workers()
+    chunksize = chunksize or config.get('default', 'settings.cpu_chunksize', 8)
+    items = iter(items)
+
+    if workers <= 1:
+        for item in items:
+            yield from _run_chunk(func, [item])
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+
+        def submit_next():
+            chunk = list(islice(items, chunksize))
+            if chunk:
+                in_flight.append((executor.submit(_run_chunk, func, chunk), chunk))
+
+        for _ in range(workers * 2):
+            submit_next()
+
+        while in_flight:
+            if ordered:
+                finished = [in_flight.popleft()]
+            else:
+                done, _ = wait([future for future, _ in in_flight], return_when=FIRST_COMPLETED)
+                finished = [entry for entry in in_flight if entry[0] in done]
+                for entry in finished:
+                    in_flight.remove(entry)
+
+            for future, chunk in finished:
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # The whole chunk was lost (e.g. a worker crashed)
+                    results = [(item, None, e) for item in chunk]
+                yield from results
+                submit_next()
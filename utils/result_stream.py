@@ -0,0 +1,106 @@
+"""
+516 Digital Investigation Tools - Streaming Result Sink
+Append-only NDJSON output that survives crashes and can be tailed live
+"""
+
+import json
+import os
+from datetime import datetime
+
+def _drop_torn_tail(path, block_size=65536):
+    """Cut a partial last line left by a crash, so appended records start on a line of their own"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            f.truncate(position)
+
+class NDJSONSink516:
+    """Writes one compact JSON record per line, flushed as it is written"""
+
+    def __init__(self, path, tool=None):
+        self.path = path
+        self.tool = tool
+        self.records_written = 0
+        _drop_torn_tail(path)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    @classmethod
+    def create(cls, output_dir, filename_prefix, tool=None):
+        """Open a new timestamped stream in output_dir"""
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return cls(os.path.join(output_dir, f"{filename_prefix}_{timestamp}.ndjson"), tool)
+
+    def write(self, record):
+        """Append a record and flush it to disk"""
+        if self.tool and 'tool' not in record:
+            record = dict(record, tool=self.tool)
+        self._file.write(json.dumps(record, separators=(',', ':'), ensure_ascii=False, default=str) + '\n')
+        self._file.flush()
+        self.records_written += 1
+
+    def write_lines(self, text, count):
+        """Append `count` records that are already serialized as NDJSON
+
+        The text is written as-is: unlike write(), no `tool` field is added,
+        so callers include it in the records themselves.
+        """
+        if not text:
+            return
+        self._file.write(text if text.endswith('\n') else text + '\n')
+        self._file.flush()
+        self.records_written += count
+
+    def write_probe(self, username, platform, outcome):
+        """Append the outcome of a single username/platform probe"""
+        record = {'type': 'probe', 'username': username, 'platform': platform}
+        record.update(outcome)
+        record.setdefault('timestamp', datetime.now().isoformat())
+        self.write(record)
+
+    def close(self, summary=None):
+        """Write the final summary record (if any) and close the stream"""
+        if summary is not None:
+            self.write(dict({'type': 'summary', 'finished_at': datetime.now().isoformat()}, **summary))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._file.closed:
+            self._file.close()
+
+def read_stream(path, record_type=None):
+    """Yield records from an NDJSON stream, skipping a torn final line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record_type is None or record.get('type') == record_type:
+                yield record
+
+def group_probes(path):
+    """Rebuild {username: {platform: outcome}} from the probe records of a stream"""
+    grouped = {}
+    for record in read_stream(path, 'probe'):
+        outcome = {k: v for k, v in record.items() if k not in ('type', 'tool', 'username', 'platform')}
+        grouped.setdefault(record['username'], {})[record['platform']] = outcome
+    return grouped
@@ -0,0 +1,149 @@
+"""
+516 Digital Investigation Tools - Probe Scheduler
+Per-host token buckets for interleaving bulk probes across platforms
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.config_loader import config
+
+class TokenBucket516:
+    """Thread-safe token bucket refilled at `rate` tokens per second"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how many seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self, timeout=None):
+        """Block until a token is available; False (token returned) if that would take over timeout seconds"""
+        wait = self.reserve()
+        if timeout is not None and wait > timeout:
+            self.release()
+            return False
+        time.sleep(wait)
+        return True
+
+    def release(self):
+        """Give back an unused reservation"""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+class HostScheduler516:
+    """Runs (username, rule) probes with one queue and token bucket per host"""
+
+    def __init__(self, engine, rate=None, burst=None, lookahead=None):
+        self.engine = engine
+        self.rate = rate or config.get('default', 'settings.per_host_rate', 2.0)
+        self.burst = burst or config.get('default', 'settings.per_host_burst', 5)
+        self.lookahead = lookahead or config.get('default', 'settings.host_lookahead', 32)
+        self.buckets = {}
+
+    def bucket_for(self, rule):
+        """Token bucket shared by every rule that targets the same host"""
+        if rule.host not in self.buckets:
+            self.buckets[rule.host] = TokenBucket516(rule.rate_limit or self.rate, self.burst)
+        return self.buckets[rule.host]
+
+    async def run_async(self, jobs, on_result=None, collect=True):
+        """Probe every (username, rule) job; returns {username: {platform: outcome}}
+
+        Jobs are pulled from the iterable as the hosts make room for them:
+        each host queues at most `lookahead` jobs ahead of its probes, so a
+        huge username list is never expanded in memory and probing starts
+        with the first job. With collect=False outcomes are only handed to
+        on_result, so memory stays flat however many usernames are scanned.
+        """
+        results = {}
+        queues = {}
+        drains = []
+        slots = asyncio.Semaphore(self.engine.max_workers)
+
+        def report(username, rule, outcome):
+            if collect:
+                results.setdefault(username, {})[rule.key] = outcome
+            if on_result:
+                on_result(username, rule.key, outcome)
+
+        async def probe(username, rule):
+            async def pace():
+                await asyncio.sleep(self.bucket_for(rule).reserve())
+
+            outcome = await self.engine.probe_rule_async(
+                rule, username, executor, slots, pace=pace, held=True
+            )
+            report(username, rule, outcome)
+
+        async def drain(queue):
+            # Each host only launches what its platform window admits and
+            # paces itself through its own bucket, so a slow or throttled
+            # host never holds back the others beyond its look-ahead
+            tasks = set()
+            failed = []
+
+            def settle(task):
+                tasks.discard(task)
+                if not task.cancelled() and task.exception() is not None:
+                    failed.append(task)
+
+            while not failed:
+                job = await queue.get()
+                if job is None:
+                    break
+                username, rule = job
+                await self.engine.window_for(rule).acquire()
+                task = asyncio.ensure_future(probe(username, rule))
+                tasks.add(task)
+                task.add_done_callback(settle)
+            await asyncio.gather(*tasks, *failed)
+
+        def stop_feeding(task):
+            # A failed host must not leave the feeder waiting on its full queue
+            if not task.cancelled() and task.exception() is not None:
+                feeding.cancel()
+
+        async def feed():
+            for username, rule in jobs:
+                # Cached outcomes never touch the network, so they skip the buckets
+                cached = self.engine.cached_outcome(rule, username)
+                if cached is not None:
+                    report(username, rule, cached)
+                    # Let running probes progress through long runs of cache hits
+                    await asyncio.sleep(0)
+                    continue
+                if rule.host not in queues:
+                    queues[rule.host] = asyncio.Queue(self.lookahead)
+                    drains.append(asyncio.ensure_future(drain(queues[rule.host])))
+                    drains[-1].add_done_callback(stop_feeding)
+                await queues[rule.host].put((username, rule))
+            for queue in queues.values():
+                await queue.put(None)
+
+        with ThreadPoolExecutor(max_workers=self.engine.max_workers) as executor:
+            feeding = asyncio.ensure_future(feed())
+            try:
+                await feeding
+            except asyncio.CancelledError:
+                if not feeding.cancelled():
+                    raise
+            # Re-raises the failure of a host that stopped the feeder
+            await asyncio.gather(*drains)
+
+        return results
+
+    def run(self, jobs, on_result=None, collect=True):
+        """Synchronous entry point for run_async"""
+        return asyncio.run(self.run_async(jobs, on_result, collect))
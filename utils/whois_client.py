@@ -0,0 +1,216 @@
+"""
+516 Digital Investigation Tools - WHOIS Client
+Cached raw WHOIS responses with per-registry-server rate limiting
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from whois import NICClient, WhoisEntry, WhoisError, extract_domain
+from utils.config_loader import config
+from utils.scheduler import TokenBucket516
+
+class WhoisRecord516:
+    """Raw WHOIS text for a domain, parsed only when first asked for"""
+
+    def __init__(self, domain, raw, server=None, fetched_at=None, cached=False):
+        self.domain = domain
+        self.raw = raw
+        self.server = server
+        self.fetched_at = fetched_at or time.time()
+        self.cached = cached
+        self._parsed = None
+
+    @property
+    def parsed(self):
+        """python-whois entry for the raw text (raises if the registry reports no match)"""
+        if self._parsed is None:
+            self._parsed = WhoisEntry.load(self.domain, self.raw)
+        return self._parsed
+
+    @property
+    def found(self):
+        """False when the text does not parse, e.g. a registry's "No match" answer"""
+        try:
+            self.parsed
+        except Exception:
+            return False
+        return True
+
+class WhoisCache516:
+    """SQLite store of raw WHOIS responses keyed by domain
+
+    Responses that do not parse (mostly "not found") only live for
+    negative_ttl, so a domain registered after its first lookup shows up
+    soon rather than a week later.
+    """
+
+    def __init__(self, path, ttl=604800, negative_ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS whois_responses (
+                domain TEXT PRIMARY KEY,
+                server TEXT,
+                raw TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, domain):
+        """Return the cached record if younger than the TTL, otherwise None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT server, raw, fetched_at FROM whois_responses WHERE domain = ?", (domain,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        record = WhoisRecord516(domain, row[1], server=row[0], fetched_at=row[2], cached=True)
+        return record if self.is_fresh(record) else None
+
+    def is_fresh(self, record):
+        """Whether a record is still within its TTL (the short one if it does not parse)"""
+        age = time.time() - record.fetched_at
+        if age > self.ttl:
+            return False
+        # Only records past the negative TTL need parsing to decide
+        return age <= self.negative_ttl or record.found
+
+    def put(self, record):
+        """Store a freshly fetched record"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO whois_responses (domain, server, raw, fetched_at) VALUES (?, ?, ?, ?)",
+                (record.domain, record.server, record.raw, record.fetched_at)
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            self._conn.close()
+
+class WhoisClient516:
+    """Fetches WHOIS text through the cache, pacing queries per registry server
+
+    Each first-hop WHOIS server gets its own token bucket, so a bulk run
+    holds a steady rate against every registry rather than bursting into
+    a lockout. Parsed records are memoized in a small in-process LRU.
+    """
+
+    def __init__(self, cache=None, rate=None, burst=None, server_rates=None, timeout=None, memo_size=1024):
+        settings = config.get('default', 'whois', {})
+        self.cache = cache
+        self.rate = rate or settings.get('server_rate', 0.5)
+        self.burst = burst or settings.get('server_burst', 2)
+        self.server_rates = server_rates if server_rates is not None else settings.get('server_rates', {})
+        self.timeout = timeout or config.get('default', 'settings.request_timeout', 10)
+        self.memo_size = memo_size
+        self.buckets = {}
+        self.stats = {'lookups': 0, 'cache_hits': 0, 'network': 0, 'rate_limited': 0}
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self._nic = NICClient()
+
+    def bucket_for(self, server):
+        """Token bucket shared by every lookup against the same WHOIS server"""
+        with self._lock:
+            if server not in self.buckets:
+                self.buckets[server] = TokenBucket516(self.server_rates.get(server, self.rate), self.burst)
+            return self.buckets[server]
+
+    def lookup(self, domain, deadline=None):
+        """WhoisRecord516 for a domain, from memory, the disk cache or the network
+
+        `deadline` is a time.monotonic() value; a network lookup that would
+        have to wait past it for its server's bucket raises WhoisError
+        instead of queueing a query nobody will read.
+        """
+        domain = extract_domain(domain).encode('idna').decode('utf-8').lower()
+
+        with self._lock:
+            self.stats['lookups'] += 1
+            record = self._memo.get(domain)
+            if record is not None and (self.cache is None or self.cache.is_fresh(record)):
+                self._memo.move_to_end(domain)
+                self.stats['cache_hits'] += 1
+                return record
+
+        record = self.cache.get(domain) if self.cache is not None else None
+        if record is not None:
+            with self._lock:
+                self.stats['cache_hits'] += 1
+        else:
+            record = self._fetch(domain, deadline)
+            if self.cache is not None:
+                self.cache.put(record)
+
+        with self._lock:
+            self._memo[domain] = record
+            self._memo.move_to_end(domain)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return record
+
+    def _fetch(self, domain, deadline=None):
+        """Query the registry server for a domain, waiting for its bucket first"""
+        server = self._server_for(domain)
+        if server is None:
+            raise WhoisError(f"No WHOIS server known for {domain}")
+
+        timeout = self.timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if not self.bucket_for(server).acquire(timeout=remaining):
+                with self._lock:
+                    self.stats['rate_limited'] += 1
+                raise WhoisError(f"Rate limited: {server} has no free slot before the deadline")
+            timeout = max(1, min(timeout, deadline - time.monotonic()))
+        else:
+            self.bucket_for(server).acquire()
+        with self._lock:
+            self.stats['network'] += 1
+        raw = self._query(server, domain, timeout)
+        if not raw:
+            raise WhoisError("Whois command returned no output")
+        return WhoisRecord516(domain, raw, server=server)
+
+    def _server_for(self, domain):
+        """First-hop WHOIS server for a domain's TLD"""
+        return self._nic.choose_server(domain)
+
+    def _query(self, server, domain, timeout):
+        """Raw WHOIS text from the network"""
+        return NICClient().whois_lookup(None, domain, 0, quiet=True, ignore_socket_errors=False, timeout=timeout)
+
+def open_whois_cache():
+    """Open the WHOIS cache in the output directory, or None when disabled in config"""
+    settings = config.get('default', 'whois', {})
+    if not settings.get('cache_enabled', True):
+        return None
+
+    output_dir = config.get('default', 'settings.output_directory', 'outputs')
+    os.makedirs(output_dir, exist_ok=True)
+    return WhoisCache516(
+        os.path.join(output_dir, settings.get('cache_filename', 'whois_cache.sqlite')),
+        ttl=settings.get('cache_ttl', 604800),
+        negative_ttl=settings.get('negative_ttl', 3600)
+    )
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+def get_whois_client():
+    """Process-wide WHOIS client, so bulk workers share caches and buckets"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = WhoisClient516(cache=open_whois_cache())
+        return _shared_client